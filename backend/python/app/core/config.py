@@ -126,6 +126,7 @@ class Settings:
     # File Configuration
     ALLOWED_EXTENSIONS: List[str] = ['.xlsx', '.csv']
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_COPY_BUFFER_SIZE: int = 1024 * 1024  # 1MB chunks when saving uploads
     
     # Directory Configuration - BRAND-SPECIFIC DATA STRUCTURE
     BASE_DIR: Path = Path(__file__).parent.parent.parent
@@ -152,11 +153,17 @@ class Settings:
     MAX_FILTER_OPTIONS: int = 50
     DEFAULT_DATA_LIMIT: int = 1000
     
+    # PowerPoint Configuration - widescreen template with pre-styled title/content layouts
+    PPTX_TEMPLATE_PATH: Path = BASE_DIR / "app" / "services" / "templates" / "analysis_template.pptx"
+    
     def __init__(self):
         """Initialize settings - no automatic directory creation"""
         # No longer auto-create legacy directories
         # Only brand-specific directories will be created on demand
-        pass
+        
+        # Bumped whenever create_brand_directories creates a directory, so caches
+        # of the brand directory layout (e.g. FileService's search dirs) can refresh
+        self.brand_directories_version = 0
     
     def get_brand_directories(self, brand_name: str) -> dict:
         """
@@ -206,8 +213,17 @@ class Settings:
         directories = self.get_brand_directories(brand_name)
         
         # Create all directories
+        created = False
         for dir_path in directories.values():
-            dir_path.mkdir(parents=True, exist_ok=True)
+            try:
+                dir_path.mkdir(parents=True)
+                created = True
+            except FileExistsError:
+                if not dir_path.is_dir():
+                    raise
+        
+        if created:
+            self.brand_directories_version += 1
             
         return directories
     
@@ -314,14 +314,13 @@ class PackSizeAnalyzer:
             return []
         
         if user_order:
-            # Sort by user-defined order
-            def sort_key(pack_size):
-                try:
-                    return user_order.index(pack_size)
-                except ValueError:
-                    return len(user_order)  # Put unknown sizes at the end
+            # Sort by user-defined order (first occurrence wins, like list.index)
+            positions = {}
+            for position, pack_size in enumerate(user_order):
+                positions.setdefault(pack_size, position)
             
-            return sorted(pack_sizes, key=sort_key)
+            # Put unknown sizes at the end
+            return sorted(pack_sizes, key=lambda pack_size: positions.get(pack_size, len(user_order)))
         else:
             # Sort by default ranking system
             return PackSizeRanker.sort_pack_sizes(pack_sizes)
@@ -409,7 +408,7 @@ class PackSizeAnalyzer:
             return True
         
         # Adjacent ranks are relevant
-        return abs(main_rank - rpi_rank) <= 1
+        return -1 <= main_rank - rpi_rank <= 1
     
     @staticmethod
     def _is_relevant_by_user_order(
@@ -425,7 +424,7 @@ class PackSizeAnalyzer:
         rpi_pos = user_order.index(rpi_size)
         
         # Same or adjacent positions are relevant
-        return abs(main_pos - rpi_pos) <= 1
+        return -1 <= main_pos - rpi_pos <= 1
     
     @staticmethod
     def _is_relevant_by_category(main_size: str, rpi_size: str) -> bool:
@@ -449,7 +448,7 @@ class PackSizeAnalyzer:
         try:
             main_idx = category_order.index(main_category)
             rpi_idx = category_order.index(rpi_category)
-            return abs(main_idx - rpi_idx) <= 1
+            return -1 <= main_idx - rpi_idx <= 1
         except ValueError:
             return False
     
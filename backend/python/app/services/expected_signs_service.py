@@ -29,160 +29,106 @@ from app.models.data_models import (
     ColumnCategories
 )
 
+# Lowercase variable prefixes, stripped in order (each followed by a single
+# space once whitespace has been collapsed)
+_VARIABLE_PREFIXES = (
+    'volume ',
+    'value ',
+    'units ',
+    'unit ',
+    'vol ',
+    'val ',
+    # Deliberate repeat: the old regex list applied both ^Units?\s+ and a later
+    # ^Unit\s+, so e.g. "Unit Vol Unit X" still reduces to "X"
+    'unit ',
+    'wtd ',
+    'price per ml ',
+    'price ',
+    'rpi ',
+    'promo ',
+    'tup ',
+    'btl ',
+    'grp ',
+    'spend ',
+)
+
+_BRAND_SUFFIX_RE = re.compile(r'\s+(Sachet|Entire Brand|150-250ML|251-500ML)$', re.IGNORECASE)
+
 def extract_brand_from_variable(variable_name: str) -> str:
     """Extract brand name from variable name by removing common prefixes"""
-    prefixes_to_remove = [
-        r'^Volume\s+',
-        r'^Value\s+', 
-        r'^Units?\s+',
-        r'^Vol\s+',
-        r'^Val\s+',
-        r'^Unit\s+',
-        r'^WTD\s+',
-        r'^Price\s+per\s+ml\s+',
-        r'^Price\s+',
-        r'^RPI\s+',
-        r'^Promo\s+',
-        r'^TUP\s+',
-        r'^BTL\s+',
-        r'^GRP\s+',
-        r'^Spend\s+'
-    ]
+    # Collapse excessive whitespace so prefixes can be matched with startswith
+    brand_name = ' '.join(variable_name.split())
+    lowered = brand_name.lower()
     
-    brand_name = variable_name.strip()
-    for prefix in prefixes_to_remove:
-        brand_name = re.sub(prefix, '', brand_name, flags=re.IGNORECASE)
+    for prefix in _VARIABLE_PREFIXES:
+        if lowered.startswith(prefix):
+            brand_name = brand_name[len(prefix):]
+            lowered = lowered[len(prefix):]
     
-    # Clean up excessive whitespace and common suffixes
-    brand_name = re.sub(r'\s+', ' ', brand_name)
-    brand_name = re.sub(r'\s+(Sachet|Entire Brand|150-250ML|251-500ML)$', '', brand_name, flags=re.IGNORECASE)
+    # Clean up common suffixes
+    brand_name = _BRAND_SUFFIX_RE.sub('', brand_name)
     
     return brand_name.strip()
 
+def build_brand_lookup(brand_categories: BrandCategories) -> Dict[str, str]:
+    """Map each lowercase brand name to its brand category ('our', 'competitor' or 'halo')"""
+    # Fill lowest priority first so our brand wins over competitors, and competitors over halo brands
+    brand_lookup = {halo.lower(): 'halo' for halo in brand_categories.haloBrands}
+    brand_lookup.update((comp.lower(), 'competitor') for comp in brand_categories.competitors)
+    brand_lookup[brand_categories.ourBrand.lower()] = 'our'
+    return brand_lookup
+
+def _lookup_brand_category(variable_name: str, brand_lookup: Dict[str, str]) -> str:
+    """Classify a variable with a prebuilt brand lookup from build_brand_lookup"""
+    return brand_lookup.get(extract_brand_from_variable(variable_name).lower(), 'unknown')
+
 def get_brand_category(variable_name: str, brand_categories: BrandCategories) -> str:
     """Determine which brand category a variable belongs to"""
-    brand_from_variable = extract_brand_from_variable(variable_name).lower()
-    
-    if brand_from_variable == brand_categories.ourBrand.lower():
-        return 'our'
-    
-    if any(comp.lower() == brand_from_variable for comp in brand_categories.competitors):
-        return 'competitor'
-    
-    if any(halo.lower() == brand_from_variable for halo in brand_categories.haloBrands):
-        return 'halo'
-    
-    return 'unknown'
+    return _lookup_brand_category(variable_name, build_brand_lookup(brand_categories))
 
-def get_distribution_expected_sign(variable_name: str, brand_categories: BrandCategories) -> VariableExpectedSign:
-    """Rule: Our brand (+, green), Other brands (-, red)"""
-    brand_category = get_brand_category(variable_name, brand_categories)
-    
-    if brand_category == 'our':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Distribution',
-            expectedSign='+',
-            color='green',
-            reason='Our brand distribution has positive impact'
-        )
-    else:
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Distribution',
-            expectedSign='-',
-            color='red',
-            reason='Competitor/other brand distribution has negative impact'
-        )
-
-def get_pricing_expected_sign(variable_name: str, brand_categories: BrandCategories) -> VariableExpectedSign:
-    """Rule: Our brand (-, red), Other brands (+, green), RPI variables (all red)"""
-    # Special case: RPI variables are always red
-    if re.search(r'RPI', variable_name, re.IGNORECASE):
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Pricing',
-            expectedSign='-',
-            color='red',
-            reason='RPI variables always have negative expected sign'
-        )
-    
-    brand_category = get_brand_category(variable_name, brand_categories)
-    
-    if brand_category == 'our':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Pricing',
-            expectedSign='-',
-            color='red',
-            reason='Our brand price increase has negative impact on volume'
-        )
-    else:
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Pricing',
-            expectedSign='+',
-            color='green',
-            reason='Competitor price increase has positive impact on our volume'
-        )
-
-def get_promotion_expected_sign(variable_name: str, brand_categories: BrandCategories) -> VariableExpectedSign:
-    """Rule: Our brand (+, green), Other brands (-, red)"""
-    brand_category = get_brand_category(variable_name, brand_categories)
-    
-    if brand_category == 'our':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Promotion',
-            expectedSign='+',
-            color='green',
-            reason='Our brand promotions have positive impact'
-        )
+# Expected sign rules keyed by (category, brand category); '*' is the fallback
+# for any brand category without an explicit rule
+_SIGN_RULES = {
+    ('Distribution', 'our'): ('+', 'green', 'Our brand distribution has positive impact'),
+    ('Distribution', '*'): ('-', 'red', 'Competitor/other brand distribution has negative impact'),
+    ('Pricing', 'rpi'): ('-', 'red', 'RPI variables always have negative expected sign'),
+    ('Pricing', 'our'): ('-', 'red', 'Our brand price increase has negative impact on volume'),
+    ('Pricing', '*'): ('+', 'green', 'Competitor price increase has positive impact on our volume'),
+    ('Promotion', 'our'): ('+', 'green', 'Our brand promotions have positive impact'),
+    ('Promotion', '*'): ('-', 'red', 'Competitor promotions have negative impact on our brand'),
+    ('Media', 'our'): ('+', 'green', 'Our brand media has positive impact'),
+    ('Media', 'competitor'): ('-', 'red', 'Competitor media has negative impact on our brand'),
+    ('Media', 'halo'): ('+', 'blue', 'Halo brand media has positive impact'),
+    ('Media', '*'): ('+', 'green', 'Unknown brand media - default positive'),
+}
+
+# Prebuilt VariableExpectedSign fields per rule; these are known-good values so
+# instances are created with model_construct and skip validation
+_RULES = {
+    (category, brand_category): {
+        'category': category,
+        'expectedSign': sign,
+        'color': color,
+        'reason': reason,
+    }
+    for (category, brand_category), (sign, color, reason) in _SIGN_RULES.items()
+}
+
+# Column categories that carry expected signs, in processing order
+SIGNED_CATEGORIES = ('Distribution', 'Pricing', 'Promotion', 'Media')
+
+_CATEGORY_NAMES = {name.lower(): name for name in SIGNED_CATEGORIES}
+
+def _build_expected_sign(variable_name: str, category: str, brand_lookup: Dict[str, str]) -> VariableExpectedSign:
+    """Look up the expected sign rule for a variable in a given category"""
+    # Special case: RPI variables are always red (literal, case-insensitive substring match)
+    if category == 'Pricing' and 'RPI' in variable_name.upper():
+        brand_category = 'rpi'
     else:
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Promotion',
-            expectedSign='-',
-            color='red',
-            reason='Competitor promotions have negative impact on our brand'
-        )
-
-def get_media_expected_sign(variable_name: str, brand_categories: BrandCategories) -> VariableExpectedSign:
-    """Rule: Our brand (+, green), Competitors (-, red), Halo brands (+, blue)"""
-    brand_category = get_brand_category(variable_name, brand_categories)
+        brand_category = _lookup_brand_category(variable_name, brand_lookup)
     
-    if brand_category == 'our':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Media',
-            expectedSign='+',
-            color='green',
-            reason='Our brand media has positive impact'
-        )
-    elif brand_category == 'competitor':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Media',
-            expectedSign='-',
-            color='red',
-            reason='Competitor media has negative impact on our brand'
-        )
-    elif brand_category == 'halo':
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Media',
-            expectedSign='+',
-            color='blue',
-            reason='Halo brand media has positive impact'
-        )
-    else:
-        return VariableExpectedSign(
-            variable=variable_name,
-            category='Media',
-            expectedSign='+',
-            color='green',
-            reason='Unknown brand media - default positive'
-        )
+    fields = _RULES.get((category, brand_category)) or _RULES[(category, '*')]
+    return VariableExpectedSign.model_construct(variable=variable_name, **fields)
 
 def calculate_expected_signs(
     column_categories: ColumnCategories, 
@@ -190,26 +136,14 @@ def calculate_expected_signs(
 ) -> ExpectedSignsMap:
     """Calculate expected signs for all variables in specified categories"""
     expected_signs = {}
+    brand_lookup = build_brand_lookup(brand_categories)
     
-    # Process Distribution variables
-    if hasattr(column_categories, 'Distribution') and column_categories.Distribution:
-        for variable in column_categories.Distribution:
-            expected_signs[variable] = get_distribution_expected_sign(variable, brand_categories)
-    
-    # Process Pricing variables
-    if hasattr(column_categories, 'Pricing') and column_categories.Pricing:
-        for variable in column_categories.Pricing:
-            expected_signs[variable] = get_pricing_expected_sign(variable, brand_categories)
-    
-    # Process Promotion variables
-    if hasattr(column_categories, 'Promotion') and column_categories.Promotion:
-        for variable in column_categories.Promotion:
-            expected_signs[variable] = get_promotion_expected_sign(variable, brand_categories)
-    
-    # Process Media variables
-    if hasattr(column_categories, 'Media') and column_categories.Media:
-        for variable in column_categories.Media:
-            expected_signs[variable] = get_media_expected_sign(variable, brand_categories)
+    for category in SIGNED_CATEGORIES:
+        variables = getattr(column_categories, category, None)
+        if not variables:
+            continue
+        for variable in variables:
+            expected_signs[variable] = _build_expected_sign(variable, category, brand_lookup)
     
     return ExpectedSignsMap(signs=expected_signs)
 
@@ -219,15 +153,8 @@ def get_expected_sign_for_variable(
     brand_categories: BrandCategories
 ) -> Optional[VariableExpectedSign]:
     """Get expected sign for a specific variable"""
-    category_lower = category.lower()
-    
-    if category_lower == 'distribution':
-        return get_distribution_expected_sign(variable_name, brand_categories)
-    elif category_lower == 'pricing':
-        return get_pricing_expected_sign(variable_name, brand_categories)
-    elif category_lower == 'promotion':
-        return get_promotion_expected_sign(variable_name, brand_categories)
-    elif category_lower == 'media':
-        return get_media_expected_sign(variable_name, brand_categories)
-    else:
+    category_name = _CATEGORY_NAMES.get(category.lower())
+    if category_name is None:
         return None
+    
+    return _build_expected_sign(variable_name, category_name, build_brand_lookup(brand_categories))
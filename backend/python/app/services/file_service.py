@@ -19,7 +19,8 @@ Key Functionality:
 - Comprehensive error handling
 
 Dependencies:
-- pandas for Excel file processing
+- csv for CSV header parsing
+- openpyxl for streaming Excel sheet analysis
 - pathlib for file operations
 - app.utils.file_utils for file utilities
 - app.core.config for settings
@@ -34,10 +35,16 @@ Last Updated: 2024-12-23
 Author: BrandBloom Backend Team
 """
 
+import csv
+import io
+import os
 import shutil
+import stat
+import tempfile
+import time
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
-import pandas as pd
+import openpyxl
 import logging
 
 from app.core.config import settings
@@ -49,16 +56,101 @@ from app.utils.file_utils import (
     find_file_with_fallback,
     find_most_recent_timestamped_file,
     get_excel_sheet_names,
-    get_excel_columns,
-    get_excel_sheet_size,
     is_excel_file,
     get_file_info
 )
 from app.models.data_models import SheetInfo
+from app.services.brand_analysis_service import BrandAnalysisService
+
+# Brand upload/export directories searched by find_file when scanning every brand,
+# cached as (monotonic timestamp, settings.brand_directories_version, directories) to
+# avoid re-walking BASE_DIR per lookup; creating brand directories invalidates it
+BRAND_SEARCH_DIRS_TTL_SECONDS = 30.0
+_brand_search_dirs_cache: Tuple[float, int, List[Path]] = (0.0, -1, [])
+
+# Upload subdirectories searched for each brand, in priority order
+_UPLOAD_SEARCH_SUBDIRS = ("intermediate", "raw", "concatenated")
+
+def _row_width(row: tuple) -> int:
+    """Return the number of cells up to and including the last non-empty one"""
+    for index in range(len(row) - 1, -1, -1):
+        if row[index] is not None:
+            return index + 1
+    return 0
+
+def _header_to_columns(header: tuple, width: int) -> List[Any]:
+    """Name header cells the way pandas does: blanks become 'Unnamed: N', duplicates get '.N' suffixes"""
+    columns = []
+    seen_counts = {}
+    for index in range(width):
+        value = header[index]
+        name = f"Unnamed: {index}" if value is None else value
+        count = seen_counts.get(name, 0)
+        seen_counts[name] = count + 1
+        columns.append(f"{name}.{count}" if count else name)
+    
+    return columns
+
+def _scan_brand_search_dirs() -> List[Path]:
+    """Collect existing upload/export directories for every brand under BASE_DIR"""
+    with os.scandir(settings.BASE_DIR) as entries:
+        brand_dirs = [Path(entry.path) for entry in entries
+                      if entry.is_dir() and not entry.name.startswith('.')]
+    
+    search_directories = []
+    for brand_dir in brand_dirs:
+        brand_data_dir = brand_dir / "data"
+        uploads_dir = brand_data_dir / "uploads"
+        
+        # One directory read replaces an exists() probe per upload subdirectory
+        try:
+            with os.scandir(uploads_dir) as entries:
+                existing_subdirs = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            existing_subdirs = set()
+        
+        search_directories.extend(
+            uploads_dir / name for name in _UPLOAD_SEARCH_SUBDIRS if name in existing_subdirs
+        )
+        
+        results_dir = brand_data_dir / "exports" / "results"
+        if results_dir.is_dir():
+            search_directories.append(results_dir)
+    
+    return search_directories
+
+def _get_all_brand_search_dirs() -> List[Path]:
+    """Return cached upload/export directories for every brand, rescanning after the TTL
+    or once settings.create_brand_directories has created new directories"""
+    global _brand_search_dirs_cache
+    
+    cached_at, version, directories = _brand_search_dirs_cache
+    now = time.monotonic()
+    current_version = settings.brand_directories_version
+    if version == current_version and now - cached_at < BRAND_SEARCH_DIRS_TTL_SECONDS:
+        return directories
+    
+    directories = _scan_brand_search_dirs()
+    _brand_search_dirs_cache = (now, current_version, directories)
+    return directories
+
+def _directory_mtime(directory: Path) -> Optional[int]:
+    """Return a directory's modification time in nanoseconds, or None if it is missing"""
+    try:
+        return directory.stat().st_mtime_ns
+    except OSError:
+        return None
 
 class FileService:
     """Service class for file operations"""
     
+    # Resolved find_file lookups keyed by (filename, brand): exact-name hits and misses
+    # only. Each entry keeps the searched directories and their mtimes; adding, removing
+    # or renaming a file in any of them changes that directory's mtime and invalidates
+    # the entry.
+    _file_index: Dict[Tuple[str, Optional[str]], Tuple[List[Path], Tuple[Optional[int], ...], Tuple[Optional[Path], str]]] = {}
+    FILE_INDEX_MAX_ENTRIES = 1024
+    
     @staticmethod
     def _handle_first_upload_for_brand(brand: str) -> None:
         """
@@ -67,10 +159,6 @@ class FileService:
         Args:
             brand: Brand name
         """
-        from app.services.brand_analysis_service import BrandAnalysisService
-        import json
-        import shutil
-        
         analysis_id = BrandAnalysisService._create_analysis_id(brand)
         
         # Check if pending analysis exists
@@ -78,34 +166,70 @@ class FileService:
         pending_analysis_file = pending_analyses_dir / f"{analysis_id}.json"
         
         if pending_analysis_file.exists():
-            print(f"📁 First upload for brand '{brand}' - creating analysis folder structure")
+            logger.info("First upload for brand '%s' - creating analysis folder structure", brand)
             
             # Create brand directory structure
             brand_directories = settings.create_brand_directories(brand)
             
-            # Read pending analysis data
-            with open(pending_analysis_file, 'r', encoding='utf-8') as f:
-                analysis_data = json.load(f)
-            
-            # Move analysis to proper brand location
+            # Move analysis to proper brand location - the pending file is already in the
+            # final JSON format, so a rename is enough (shutil.move copies across devices)
             brand_analysis_dir = brand_directories["analyses_dir"]
             brand_analysis_file = brand_analysis_dir / "analysis.json"
             
-            with open(brand_analysis_file, 'w', encoding='utf-8') as f:
-                json.dump(analysis_data, f, indent=2, ensure_ascii=False, default=str)
-            
-            # Remove pending analysis file
-            pending_analysis_file.unlink()
+            shutil.move(str(pending_analysis_file), str(brand_analysis_file))
             
-            print(f"✅ Analysis moved from pending to: {brand_analysis_file}")
-            print(f"✅ Brand folder structure created for: {brand}")
+            logger.info("Analysis moved from pending to: %s", brand_analysis_file)
+            logger.info("Brand folder structure created for: %s", brand)
         else:
             # No pending analysis - this might be a legacy upload or direct upload
-            # Still create directories if they don't exist
-            brand_dirs = settings.get_brand_directories(brand)
-            if not brand_dirs["brand_root"].exists():
-                print(f"📁 Creating brand directories for existing upload: {brand}")
-                settings.create_brand_directories(brand)
+            # Still ensure the directories exist (creation uses exist_ok, so no existence probe)
+            logger.info("Ensuring brand directories for existing upload: %s", brand)
+            settings.create_brand_directories(brand)
+    
+    @staticmethod
+    def _save_uploaded_file(source, destination: Path) -> None:
+        """
+        Save an uploaded file object to disk
+        
+        Uses os.sendfile for a kernel-side copy when the upload is backed by a real
+        file on disk, otherwise copies in large chunks.
+        
+        Args:
+            source: File-like object of the upload
+            destination: Path to write the file to
+        """
+        in_fd = None
+        # Spooled uploads still held in memory would be forced to disk by fileno()
+        in_memory = isinstance(source, tempfile.SpooledTemporaryFile) and not source._rolled
+        if hasattr(os, "sendfile") and not in_memory:
+            try:
+                in_fd = source.fileno()
+            except (AttributeError, io.UnsupportedOperation, OSError):
+                in_fd = None
+        
+        with open(destination, "wb") as buffer:
+            if in_fd is not None:
+                try:
+                    offset = source.tell()
+                    end = os.fstat(in_fd).st_size
+                    out_fd = buffer.fileno()
+                    
+                    while offset < end:
+                        sent = os.sendfile(out_fd, in_fd, offset, end - offset)
+                        if not sent:
+                            break
+                        offset += sent
+                    
+                    if offset >= end:
+                        return
+                except (AttributeError, OSError, ValueError):
+                    pass
+                
+                # Fall back to a plain copy from the start of the upload
+                buffer.seek(0)
+                buffer.truncate()
+            
+            shutil.copyfileobj(source, buffer, length=settings.UPLOAD_COPY_BUFFER_SIZE)
     
     @staticmethod
     def process_upload(file, filename: str, brand: str = None) -> Dict[str, Any]:
@@ -136,14 +260,12 @@ class FileService:
         # If so, create the analysis folder structure and move pending analysis
         FileService._handle_first_upload_for_brand(brand)
         
+        # Brand directories were created by _handle_first_upload_for_brand
         brand_dirs = settings.get_brand_directories(brand)
         raw_file_path = brand_dirs["raw_dir"] / processed_name
-        # Ensure brand directories exist (should already be created by _handle_first_upload_for_brand)
-        brand_dirs["raw_dir"].mkdir(parents=True, exist_ok=True)
         
         # Save the file to raw directory
-        with open(raw_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        FileService._save_uploaded_file(file.file, raw_file_path)
         
         # Get file info
         file_info = get_file_info(raw_file_path)
@@ -163,18 +285,19 @@ class FileService:
         
         # Process Excel files for sheet information
         if is_excel_file(filename):
-            sheets_info = FileService.get_excel_sheets_info(raw_file_path)
+            sheets_info, total_rows, max_columns = FileService.get_excel_sheets_info(raw_file_path)
             if sheets_info:
                 result["sheets"] = sheets_info
                 result["fileStats"] = {
-                    "totalRows": sum(sheet["totalRows"] for sheet in sheets_info),
-                    "totalColumns": max(sheet["totalColumns"] for sheet in sheets_info) if sheets_info else 0
+                    "totalRows": total_rows,
+                    "totalColumns": max_columns
                 }
         else:
-            # CSV file processing
+            # CSV file processing - only the header line is needed here
             try:
-                df = pd.read_csv(raw_file_path, nrows=0)
-                columns = df.columns.tolist()
+                with open(raw_file_path, 'r', newline='', encoding='utf-8-sig') as f:
+                    header = next(csv.reader(f))
+                columns = _header_to_columns(tuple(value or None for value in header), len(header))
                 result["columns"] = columns
                 result["fileStats"] = {
                     "totalRows": 0,  # Will be calculated later if needed
@@ -187,7 +310,7 @@ class FileService:
         return result
     
     @staticmethod
-    def get_excel_sheets_info(file_path: Path) -> List[Dict[str, Any]]:
+    def get_excel_sheets_info(file_path: Path) -> Tuple[List[Dict[str, Any]], int, int]:
         """
         Get comprehensive sheet information from Excel file
         
@@ -195,27 +318,58 @@ class FileService:
             file_path: Path to Excel file
             
         Returns:
-            List of sheet information dictionaries
+            Tuple of (sheet information dictionaries, total rows across sheets,
+            widest sheet's column count)
         """
         try:
-            sheet_names = get_excel_sheet_names(file_path)
+            # Open the workbook once in streaming mode instead of re-parsing it per sheet
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception:
+            return [], 0, 0
+        
+        try:
             sheets_info = []
+            file_total_rows = 0
+            file_max_columns = 0
             
-            for sheet_name in sheet_names:
-                columns = get_excel_columns(file_path, sheet_name)  # Get all columns
-                total_rows, total_cols = get_excel_sheet_size(file_path, sheet_name)
+            for worksheet in workbook.worksheets:
+                header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+                header_width = _row_width(header)
+                columns = _header_to_columns(header, header_width)
+                
+                # Read-only worksheets take their size from the sheet's dimension metadata
+                # without parsing cells; missing dimensions or the bare 'A1' placeholder
+                # written for empty sheets fall back to streaming the rows
+                max_row, max_column = worksheet.max_row, worksheet.max_column
+                if max_row and max_column and (max_row, max_column) != (1, 1):
+                    total_rows = max_row - 1
+                    width = max(max_column, header_width)
+                else:
+                    # Trailing empty rows are not counted
+                    width = header_width
+                    total_rows = 0
+                    rows = worksheet.iter_rows(min_row=2, values_only=True)
+                    for row_number, row in enumerate(rows, start=1):
+                        row_width = _row_width(row)
+                        if row_width:
+                            total_rows = row_number
+                            width = max(width, row_width)
                 
                 sheets_info.append({
-                    "sheetName": sheet_name,
+                    "sheetName": worksheet.title,
                     "columns": columns,
                     "totalRows": total_rows,
-                    "totalColumns": total_cols,
+                    "totalColumns": width,
                     "isSelected": True
                 })
+                file_total_rows += total_rows
+                file_max_columns = max(file_max_columns, width)
             
-            return sheets_info
+            return sheets_info, file_total_rows, file_max_columns
         except Exception:
-            return []
+            return [], 0, 0
+        finally:
+            workbook.close()
     
     @staticmethod
     def find_file(filename: str, brand: str = None) -> Tuple[Optional[Path], str]:
@@ -246,29 +400,38 @@ class FileService:
         
         # Also search all existing brand directories (in case brand not specified)
         try:
-            for brand_dir in settings.BASE_DIR.iterdir():
-                if brand_dir.is_dir() and not brand_dir.name.startswith('.'):
-                    brand_data_dir = brand_dir / "data"
-                    if brand_data_dir.exists():
-                        potential_dirs = [
-                            brand_data_dir / "uploads" / "intermediate",
-                            brand_data_dir / "uploads" / "raw",
-                            brand_data_dir / "uploads" / "concatenated",
-                            brand_data_dir / "exports" / "results"
-                        ]
-                        search_directories.extend([d for d in potential_dirs if d.exists()])
+            search_directories.extend(_get_all_brand_search_dirs())
         except Exception as e:
             logger.warning(f"Failed to scan brand directories: {e}")
         
         # NO MORE LEGACY DIRECTORIES - Only brand-specific search
         
+        # Brand directories also show up in the all-brands scan; search each directory once
+        search_directories = list(dict.fromkeys(search_directories))
+        
+        # Reuse the previous result while none of the searched directories changed
+        index_key = (filename, brand)
+        directory_mtimes = tuple(_directory_mtime(directory) for directory in search_directories)
+        cached = FileService._file_index.get(index_key)
+        if cached and cached[0] == search_directories and cached[1] == directory_mtimes:
+            return cached[2]
+        
         # Try exact filename first
-        file_path, source = find_file_with_fallback(filename, search_directories)
-        if file_path:
-            return file_path, source
+        result = find_file_with_fallback(filename, search_directories)
+        if not result[0]:
+            # Try finding most recent timestamped version
+            result = find_most_recent_timestamped_file(filename, search_directories)
+            if result[0]:
+                # The pick depends on every candidate's own mtime, which rewriting a file
+                # in place changes without touching the directory mtime - don't cache it
+                FileService._file_index.pop(index_key, None)
+                return result
+        
+        if len(FileService._file_index) >= FileService.FILE_INDEX_MAX_ENTRIES:
+            FileService._file_index.clear()
+        FileService._file_index[index_key] = (search_directories, directory_mtimes, result)
         
-        # Try finding most recent timestamped version
-        return find_most_recent_timestamped_file(filename, search_directories)
+        return result
     
     @staticmethod
     def get_sheet_information(filename: str, brand: str = None) -> Dict[str, Any]:
@@ -289,7 +452,7 @@ class FileService:
         if not is_excel_file(str(file_path)):
             raise ValueError("This endpoint only supports Excel (.xlsx) files")
         
-        sheets_info = FileService.get_excel_sheets_info(file_path)
+        sheets_info, _, _ = FileService.get_excel_sheets_info(file_path)
         
         return {
             "filename": file_path.name,
@@ -342,14 +505,24 @@ class FileService:
         Returns:
             List of file information dictionaries
         """
-        if not directory.exists():
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError):
             return []
         
+        # DirEntry caches its file type and stat result, so each file costs at most one stat
         files_info = []
-        for file_path in directory.glob("*"):
-            if file_path.is_file():
-                file_info = get_file_info(file_path)
-                files_info.append(file_info)
+        with entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat_info = entry.stat()
+                    files_info.append({
+                        "name": entry.name,
+                        "size": stat_info.st_size,
+                        "modified": stat_info.st_mtime,
+                        "is_file": True,
+                        "extension": Path(entry.name).suffix.lower()
+                    })
         
         return files_info
     
@@ -371,25 +544,33 @@ class FileService:
             "file_info": {}
         }
         
-        # Check if file exists
-        if not file_path.exists():
+        # Check file extension first - pure string check, no filesystem access
+        if not validate_file_extension(file_path.name):
             validation_result["is_valid"] = False
-            validation_result["errors"].append(f"File does not exist: {file_path}")
+            validation_result["errors"].append(f"Invalid file extension: {file_path.suffix}")
             return validation_result
         
-        # Get file information
-        file_info = get_file_info(file_path)
-        validation_result["file_info"] = file_info
-        
-        # Check file extension
-        if not validate_file_extension(file_path.name):
+        # Single stat call covers the existence check and the file information
+        try:
+            stat_info = file_path.stat()
+        except OSError:
             validation_result["is_valid"] = False
-            validation_result["errors"].append(f"Invalid file extension: {file_path.suffix}")
+            validation_result["errors"].append(f"File does not exist: {file_path}")
+            return validation_result
         
-        # Check file size
-        if file_info.get("size", 0) > settings.MAX_FILE_SIZE:
+        validation_result["file_info"] = {
+            "name": file_path.name,
+            "size": stat_info.st_size,
+            "modified": stat_info.st_mtime,
+            "is_file": stat.S_ISREG(stat_info.st_mode),
+            "extension": file_path.suffix.lower()
+        }
+        
+        # Check file size - oversized files are rejected without opening them
+        if stat_info.st_size > settings.MAX_FILE_SIZE:
             validation_result["is_valid"] = False
-            validation_result["errors"].append(f"File too large: {file_info['size']} bytes")
+            validation_result["errors"].append(f"File too large: {stat_info.st_size} bytes")
+            return validation_result
         
         # Excel-specific validation
         if is_excel_file(file_path.name):
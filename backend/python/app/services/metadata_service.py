@@ -19,7 +19,7 @@ Key Functionality:
 - Automatic directory creation
 
 Dependencies:
-- json for state serialization
+- orjson for state serialization (falls back to json when not installed)
 - pathlib for file operations
 - datetime for timestamp management
 - app.core.config for settings
@@ -34,15 +34,209 @@ Last Updated: 2024-12-23
 Author: BrandBloom Backend Team
 """
 
+import functools
 import json
 import os
+import re
+import shutil
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from app.core.config import settings
 from app.models.data_models import ConcatenationState
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps_state(data: Any) -> bytes:
+    """Serialize state data to indented UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _dumps_line(data: Any) -> bytes:
+    """Serialize data to a single line of compact UTF-8 JSON, newline-terminated"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def _loads_state(raw: bytes) -> Any:
+    """Parse JSON state bytes"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # Older state files may contain NaN/Infinity, which only json accepts
+            pass
+    return json.loads(raw)
+
+# Filename brand extraction patterns
+_TIMESTAMP_RE = re.compile(r'_\d{10,}')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s-]')
+_SEPARATOR_RE = re.compile(r'[_\-\s]')
+# All four patterns below as one anchored alternation, in priority order
+_BRAND_PATTERN_RE = re.compile(
+    r'^(?:'
+    r'.*? - (?P<nielsen>.*?)(?: - |$)'
+    r'|(?P<under>[^_]*)_'
+    r'|(?P<dash>[^-]*)-'
+    r'|(?P<rest>[^_\-\s]*)[_\-\s]'
+    r')',
+    re.DOTALL
+)
+
+def _brand_candidates(base_name: str):
+    """Yield brand name candidates from a filename, most specific pattern first"""
+    # A single regex scan picks the candidate of the most specific matching pattern;
+    # the split-based patterns below only run if that candidate cleans up to nothing
+    match = _BRAND_PATTERN_RE.match(base_name)
+    if not match:
+        return
+    yield match.group(match.lastgroup)
+    
+    # Pattern 1: NIELSEN - Brand Name - Other Text...
+    if " - " in base_name:
+        yield base_name.split(" - ", 2)[1]
+    
+    # Pattern 2: BrandName_other_text (like X-Men_x-men_with_rpis)
+    if "_" in base_name:
+        yield base_name.split("_", 1)[0]
+    
+    # Pattern 3: BrandName-other-text
+    if "-" in base_name:
+        yield base_name.split("-", 1)[0]
+    
+    # Pattern 4: Just use the first part before any separator
+    separator = _SEPARATOR_RE.search(base_name)
+    if separator:
+        yield base_name[:separator.start()]
+
+@functools.lru_cache(maxsize=128)
+def _brand_dirs(brand: str) -> Dict[str, Path]:
+    """Brand directory paths, memoized per brand (the mapping is pure path arithmetic)"""
+    return settings.get_brand_directories(brand)
+
+def _atomic_write_bytes(filepath: Path, payload: bytes) -> None:
+    """Write a file via a temporary sibling and os.replace so readers never see a partial file"""
+    # Unique per process and thread so concurrent saves of the same file don't share a temp file
+    tmp_filepath = filepath.with_name(f"{filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_filepath.write_bytes(payload)
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        tmp_filepath.unlink(missing_ok=True)
+        raise
+
+def _write_state_file(state_filepath: Path, payload: bytes) -> None:
+    """Write a state file, creating the metadata directory only when it is missing"""
+    try:
+        _atomic_write_bytes(state_filepath, payload)
+    except FileNotFoundError:
+        # First save for this brand, or the brand folder was removed since
+        state_filepath.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write_bytes(state_filepath, payload)
+
+# State validation: required keys and (field, type, description) checks for optional keys
+_REQUIRED_STATE_FIELD_ORDER = ("originalFileName", "concatenatedFileName")
+_REQUIRED_STATE_FIELDS = frozenset(_REQUIRED_STATE_FIELD_ORDER)
+_STATE_FIELD_TYPES = (
+    ("selectedSheets", list, "a list"),
+    ("selectedFilters", list, "a list"),
+    ("totalRows", (int, float), "a number"),
+)
+
+# NDJSON listing index kept by list_all_states in the directory it scans
+# (settings.METADATA_DIR), holding the summary of every state file there. Each
+# line is {"filename", "mtime", "info"}; entries whose mtime no longer matches
+# are re-read, and the index is rewritten when a listing finds changes
+_STATE_INDEX_FILENAME = "states.ndjson"
+_STATE_FILE_SUFFIX = "_state.json"
+_DATA_FILE_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+def _state_key(filename: str) -> str:
+    """State filename for a data file: its name without a known data extension, plus _state.json"""
+    lowered = filename.lower()
+    for extension in _DATA_FILE_EXTENSIONS:
+        if lowered.endswith(extension):
+            return filename[:-len(extension)] + _STATE_FILE_SUFFIX
+    return filename + _STATE_FILE_SUFFIX
+
+def _state_summary(state_filename: str, state_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the key information shown when listing states"""
+    return {
+        "filename": state_filename,
+        "originalFileName": state_data.get("originalFileName"),
+        "concatenatedFileName": state_data.get("concatenatedFileName"),
+        "savedAt": state_data.get("savedAt"),
+        "status": state_data.get("status", "unknown"),
+        "totalRows": state_data.get("totalRows", 0),
+        "selectedSheets": len(state_data.get("selectedSheets", []))
+    }
+
+def _index_line(state_filename: str, mtime: int, state_info: Dict[str, Any]) -> bytes:
+    """Serialize one state index entry"""
+    return _dumps_line({"filename": state_filename, "mtime": mtime, "info": state_info})
+
+def _read_state_index(metadata_dir: Path) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    Load the state index of a metadata directory
+    
+    Args:
+        metadata_dir: Metadata directory holding the index
+        
+    Returns:
+        Tuple of ({filename: {"mtime", "info"}} with the last line per filename winning,
+        number of lines read); ({}, 0) if the index is missing or unreadable
+    """
+    try:
+        raw = (metadata_dir / _STATE_INDEX_FILENAME).read_bytes()
+    except OSError:
+        return {}, 0
+    
+    index = {}
+    line_count = 0
+    for line in raw.splitlines():
+        if not line:
+            continue
+        line_count += 1
+        try:
+            entry = _loads_state(line)
+            index[entry["filename"]] = {"mtime": entry["mtime"], "info": entry["info"]}
+        except (ValueError, TypeError, KeyError):
+            # Torn or corrupted line; compaction drops it
+            continue
+    return index, line_count
+
+def _write_state_index(metadata_dir: Path, index: Dict[str, Dict[str, Any]]) -> None:
+    """Rewrite (compact) the state index of a metadata directory, one line per state file"""
+    payload = b"".join(
+        _index_line(state_filename, indexed["mtime"], indexed["info"])
+        for state_filename, indexed in index.items()
+    )
+    _atomic_write_bytes(metadata_dir / _STATE_INDEX_FILENAME, payload)
+
+def _persist_state(state_filepath: Path, state: Dict[str, Any]) -> None:
+    """Write an already-validated state file"""
+    _write_state_file(state_filepath, _dumps_state(state))
+
+def _saved_state_response(state_filepath: Path, state: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the response returned after a state file has been written"""
+    return {
+        "success": True,
+        "message": "Concatenation state saved successfully",
+        "data": {
+            "stateFileName": state_filepath.name,
+            "stateFilePath": str(state_filepath),
+            "originalFileName": state["originalFileName"],
+            "concatenatedFileName": state["concatenatedFileName"],
+            "savedAt": state["savedAt"]
+        }
+    }
+
 class MetadataService:
     """Service class for metadata operations"""
     
@@ -68,6 +262,7 @@ class MetadataService:
         # settings.METADATA_DIR.mkdir(parents=True, exist_ok=True)
         
         # Create state data with defaults
+        now_iso = datetime.now().isoformat()
         complete_state = {
             "originalFileName": state_data["originalFileName"],
             "concatenatedFileName": state_data["concatenatedFileName"],
@@ -78,8 +273,8 @@ class MetadataService:
             "previewData": state_data.get("previewData"),
             "columnCategories": state_data.get("columnCategories"),
             "totalRows": state_data.get("totalRows", 0),
-            "processedAt": state_data.get("processedAt") or datetime.now().isoformat(),
-            "savedAt": datetime.now().isoformat(),
+            "processedAt": state_data.get("processedAt") or now_iso,
+            "savedAt": now_iso,
             "status": state_data.get("status", "completed")
         }
         
@@ -90,39 +285,27 @@ class MetadataService:
                 raise ValueError("Brand parameter is required and could not be extracted from filename - no legacy fallback supported")
         
         # Generate state filename - use concatenated filename as the key for state lookup
-        state_filename = f"{state_data['concatenatedFileName'].replace('.xlsx', '')}_state.json"
+        state_filename = _state_key(state_data['concatenatedFileName'])
         
         # Use brand-specific metadata directory
-        brand_dirs = settings.get_brand_directories(brand)
-        brand_dirs["metadata_dir"].mkdir(parents=True, exist_ok=True)
-        state_filepath = brand_dirs["metadata_dir"] / state_filename
+        state_filepath = _brand_dirs(brand)["metadata_dir"] / state_filename
         
         # Save state to JSON file
-        with open(state_filepath, 'w', encoding='utf-8') as f:
-            json.dump(complete_state, f, indent=2, ensure_ascii=False)
+        _persist_state(state_filepath, complete_state)
         
-        return {
-            "success": True,
-            "message": "Concatenation state saved successfully",
-            "data": {
-                "stateFileName": state_filename,
-                "stateFilePath": str(state_filepath),
-                "originalFileName": state_data["originalFileName"],
-                "concatenatedFileName": state_data["concatenatedFileName"],
-                "savedAt": complete_state["savedAt"]
-            }
-        }
+        return _saved_state_response(state_filepath, complete_state)
     
     @staticmethod
-    def get_concatenation_state(filename: str, brand: str = None) -> Dict[str, Any]:
+    def _resolve_state_filepath(filename: str, brand: str = None) -> Path:
         """
-        Retrieve concatenation state for a file
+        Locate the brand-specific state file for a file
         
         Args:
             filename: Name of file (can be original or concatenated filename)
+            brand: Brand name, extracted from the filename when not provided
             
         Returns:
-            Dict with state data
+            Path of the state file (which may not exist)
         """
         # Extract brand if not provided
         if not brand:
@@ -130,23 +313,48 @@ class MetadataService:
             if not brand:
                 raise ValueError("Brand parameter is required and could not be extracted from filename")
         
-        # Generate state filename - use the filename directly as the key
-        state_filename = f"{filename.replace('.xlsx', '')}_state.json"
+        # Use brand-specific metadata directory, keyed by the filename
+        metadata_dir = _brand_dirs(brand)["metadata_dir"]
+        state_filepath = metadata_dir / _state_key(filename)
         
-        # Use brand-specific metadata directory
-        brand_dirs = settings.get_brand_directories(brand)
-        state_filepath = brand_dirs["metadata_dir"] / state_filename
+        # States saved before keys were unified only stripped '.xlsx' from the name
+        legacy_filename = f"{filename.replace('.xlsx', '')}{_STATE_FILE_SUFFIX}"
+        if legacy_filename != state_filepath.name and not state_filepath.exists():
+            legacy_filepath = metadata_dir / legacy_filename
+            if legacy_filepath.exists():
+                return legacy_filepath
         
-        if not state_filepath.exists():
-            raise FileNotFoundError(f"No saved state found for this file: {filename}")
+        return state_filepath
+    
+    @staticmethod
+    def _load_state(filename: str, brand: str = None) -> Tuple[Path, Dict[str, Any]]:
+        """Read and validate the state file for a file, returning its path and data"""
+        state_filepath = MetadataService._resolve_state_filepath(filename, brand)
         
         # Load state data
-        with open(state_filepath, 'r', encoding='utf-8') as f:
-            state_data = json.load(f)
+        try:
+            state_data = _loads_state(state_filepath.read_bytes())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No saved state found for this file: {filename}")
         
         # Validate state data
         MetadataService._validate_state_data(state_data)
         
+        return state_filepath, state_data
+    
+    @staticmethod
+    def get_concatenation_state(filename: str, brand: str = None) -> Dict[str, Any]:
+        """
+        Retrieve concatenation state for a file
+        
+        Args:
+            filename: Name of file (can be original or concatenated filename)
+            
+        Returns:
+            Dict with state data
+        """
+        state_data = MetadataService._load_state(filename, brand)[1]
+        
         return {
             "success": True,
             "message": "State retrieved successfully",
@@ -165,8 +373,7 @@ class MetadataService:
             Dict with deletion results
         """
         # Generate state filename
-        base_name = os.path.splitext(original_filename)[0]
-        state_filename = f"{base_name}_state.json"
+        state_filename = _state_key(original_filename)
         state_filepath = settings.METADATA_DIR / state_filename
         
         if not state_filepath.exists():
@@ -202,27 +409,39 @@ class MetadataService:
                 }
             }
         
+        metadata_dir = settings.METADATA_DIR
+        index, index_lines = _read_state_index(metadata_dir)
+        
+        # One directory read; summaries come from the index unless the file changed since
+        with os.scandir(metadata_dir) as entries:
+            state_entries = [entry for entry in entries if entry.name.endswith(_STATE_FILE_SUFFIX)]
+        
         states = []
-        for state_file in settings.METADATA_DIR.glob("*_state.json"):
+        fresh_index = {}
+        for entry in state_entries:
             try:
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    state_data = json.load(f)
+                mtime = entry.stat().st_mtime_ns
+                indexed = index.get(entry.name)
+                if indexed and indexed.get("mtime") == mtime:
+                    state_info = indexed["info"]
+                else:
+                    with open(entry.path, 'rb') as f:
+                        state_info = _state_summary(entry.name, _loads_state(f.read()))
                 
-                # Extract key information
-                state_info = {
-                    "filename": state_file.name,
-                    "originalFileName": state_data.get("originalFileName"),
-                    "concatenatedFileName": state_data.get("concatenatedFileName"),
-                    "savedAt": state_data.get("savedAt"),
-                    "status": state_data.get("status", "unknown"),
-                    "totalRows": state_data.get("totalRows", 0),
-                    "selectedSheets": len(state_data.get("selectedSheets", []))
-                }
+                fresh_index[entry.name] = {"mtime": mtime, "info": state_info}
                 states.append(state_info)
             except Exception:
                 # Skip corrupted state files
                 continue
         
+        # Rewrite the index when files were added, changed or removed since the last
+        # listing, or when it holds duplicate or corrupted lines
+        if index_lines != len(fresh_index) or fresh_index != index:
+            try:
+                _write_state_index(metadata_dir, fresh_index)
+            except OSError:
+                pass
+        
         # Sort by saved date (most recent first)
         states.sort(key=lambda x: x.get("savedAt", ""), reverse=True)
         
@@ -246,16 +465,22 @@ class MetadataService:
         Returns:
             Dict with update results
         """
-        # Get existing state
-        state_result = MetadataService.get_concatenation_state(original_filename)
-        existing_state = state_result["data"]
+        # Get existing state (validated on load)
+        state_filepath, existing_state = MetadataService._load_state(original_filename)
+        
+        # Updates must not blank out the fields that identify the state
+        for field in _REQUIRED_STATE_FIELD_ORDER:
+            if field in updates and not updates[field]:
+                raise ValueError(f"{field} is required")
         
         # Apply updates
         existing_state.update(updates)
         existing_state["savedAt"] = datetime.now().isoformat()
         
-        # Save updated state
-        return MetadataService.save_concatenation_state(existing_state)
+        # Write the updated state back in place - no re-validation or re-normalization
+        _persist_state(state_filepath, existing_state)
+        
+        return _saved_state_response(state_filepath, existing_state)
     
     @staticmethod
     def cleanup_old_states(days_old: int = 30) -> Dict[str, Any]:
@@ -280,15 +505,18 @@ class MetadataService:
         cutoff_timestamp = datetime.now().timestamp() - (days_old * 24 * 3600)
         deleted_files = []
         
-        for state_file in settings.METADATA_DIR.glob("*_state.json"):
-            try:
-                file_timestamp = state_file.stat().st_mtime
-                if file_timestamp < cutoff_timestamp:
-                    state_file.unlink()
-                    deleted_files.append(state_file.name)
-            except Exception:
-                # Skip files that can't be processed
-                continue
+        # DirEntry caches its stat result, so each state file is stat'ed once
+        with os.scandir(settings.METADATA_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith(_STATE_FILE_SUFFIX):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff_timestamp:
+                        os.unlink(entry.path)
+                        deleted_files.append(entry.name)
+                except OSError:
+                    # Skip files that can't be processed
+                    continue
         
         return {
             "success": True,
@@ -310,21 +538,16 @@ class MetadataService:
         Raises:
             ValueError: If state data is invalid
         """
-        required_fields = ["originalFileName", "concatenatedFileName"]
-        
-        for field in required_fields:
-            if field not in state_data:
-                raise ValueError(f"Missing required field: {field}")
+        missing_fields = _REQUIRED_STATE_FIELDS - state_data.keys()
+        if missing_fields:
+            # Report in declaration order so the message is deterministic
+            missing_field = next(field for field in _REQUIRED_STATE_FIELD_ORDER if field in missing_fields)
+            raise ValueError(f"Missing required field: {missing_field}")
         
         # Validate data types
-        if not isinstance(state_data.get("selectedSheets", []), list):
-            raise ValueError("selectedSheets must be a list")
-        
-        if not isinstance(state_data.get("selectedFilters", []), list):
-            raise ValueError("selectedFilters must be a list")
-        
-        if not isinstance(state_data.get("totalRows", 0), (int, float)):
-            raise ValueError("totalRows must be a number")
+        for field, expected_type, type_name in _STATE_FIELD_TYPES:
+            if field in state_data and not isinstance(state_data[field], expected_type):
+                raise ValueError(f"{field} must be {type_name}")
     
     @staticmethod
     def export_state_data(original_filename: str, export_format: str = "json") -> Path:
@@ -338,9 +561,11 @@ class MetadataService:
         Returns:
             Path to exported file
         """
-        # Get state data
-        state_result = MetadataService.get_concatenation_state(original_filename)
-        state_data = state_result["data"]
+        if export_format.lower() != "json":
+            raise ValueError(f"Unsupported export format: {export_format}")
+        
+        # Locate the persisted state file; it already holds the JSON to export
+        state_filepath = MetadataService._resolve_state_filepath(original_filename)
         
         # Generate export filename
         base_name = os.path.splitext(original_filename)[0]
@@ -348,12 +573,13 @@ class MetadataService:
         export_filename = f"{base_name}_state_export_{timestamp}.{export_format}"
         export_path = settings.METADATA_DIR / export_filename
         
-        # Export based on format
-        if export_format.lower() == "json":
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(state_data, f, indent=2, ensure_ascii=False)
-        else:
-            raise ValueError(f"Unsupported export format: {export_format}")
+        # Copy without parsing (copy_file_range/sendfile in the kernel where available)
+        try:
+            shutil.copyfile(state_filepath, export_path)
+        except FileNotFoundError:
+            if not state_filepath.exists():
+                raise FileNotFoundError(f"No saved state found for this file: {original_filename}")
+            raise
         
         return export_path
     
@@ -373,38 +599,17 @@ class MetadataService:
             base_name = filename.replace(".xlsx", "").replace(".csv", "")
             
             # Try multiple patterns to extract brand name
-            patterns_to_try = [
-                # Pattern 1: NIELSEN - Brand Name - Other Text...
-                lambda f: f.split(" - ")[1].strip() if " - " in f and len(f.split(" - ")) >= 2 else None,
-                
-                # Pattern 2: BrandName_other_text (like X-Men_x-men_with_rpis)
-                lambda f: f.split("_")[0] if "_" in f else None,
+            for brand_name in _brand_candidates(base_name):
+                # Clean up the brand name
+                brand_name = brand_name.strip()
+                # Remove timestamp patterns like _1234567890
+                brand_name = _TIMESTAMP_RE.sub('', brand_name)
+                # Remove any remaining special characters
+                brand_name = _SPECIAL_CHARS_RE.sub('', brand_name)
                 
-                # Pattern 3: BrandName-other-text
-                lambda f: f.split("-")[0] if "-" in f else None,
-                
-                # Pattern 4: Just use the first part before any separator
-                lambda f: re.split(r'[_\-\s]', f)[0] if re.search(r'[_\-\s]', f) else None
-            ]
-            
-            import re
-            
-            for pattern_func in patterns_to_try:
-                try:
-                    brand_name = pattern_func(base_name)
-                    if brand_name and len(brand_name) > 0:
-                        # Clean up the brand name
-                        brand_name = brand_name.strip()
-                        # Remove timestamp patterns like _1234567890
-                        brand_name = re.sub(r'_\d{10,}', '', brand_name)
-                        # Remove any remaining special characters
-                        brand_name = re.sub(r'[^\w\s-]', '', brand_name)
-                        
-                        if brand_name and len(brand_name) > 0:
-                            print(f"✅ Extracted brand '{brand_name}' from filename '{filename}'")
-                            return brand_name
-                except Exception:
-                    continue
+                if brand_name:
+                    print(f"✅ Extracted brand '{brand_name}' from filename '{filename}'")
+                    return brand_name
             
             print(f"⚠️ Could not extract brand from filename '{filename}'")
             return None
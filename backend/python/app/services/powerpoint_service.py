@@ -7,12 +7,13 @@ including context slides, insights, charts, and model results.
 
 import os
 import json
-import tempfile
+import functools
+import io
+import re
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-import pandas as pd
-import numpy as np
+from xml.sax.saxutils import escape
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
@@ -20,15 +21,70 @@ from pptx.dml.color import RGBColor
 from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE
 from pptx.enum.dml import MSO_THEME_COLOR
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import io
-import base64
+from pptx.oxml import parse_xml
 
 from app.core.config import settings
 
 
+@functools.lru_cache(maxsize=1)
+def _template_bytes() -> bytes:
+    """Read the presentation template once; each request parses it from memory"""
+    return settings.PPTX_TEMPLATE_PATH.read_bytes()
+
+
+_DRAWINGML_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+# Report colors as DrawingML hex values
+_HEADING_RGB = "003366"
+_BULLET_RGB = "0066CC"
+_MUTED_RGB = "666666"
+
+# Text python-pptx splits into runs at, and control characters it cannot store as XML text
+_LINE_BREAK_RE = re.compile("\n|\v")
+_CONTROL_CHAR_RE = re.compile(r"[\x00-\x08\x0B-\x1F]")
+
+
+def _paragraph_xml(text: str, size_pt: Optional[int] = None, bold: bool = False, rgb: Optional[str] = None) -> str:
+    """
+    Serialize a single-run <a:p> element
+    
+    Args:
+        text: Paragraph text
+        size_pt: Font size in points (inherits from the layout when None)
+        bold: Whether the run is bold
+        rgb: Hex font color (inherits from the layout when None)
+        
+    Returns:
+        Paragraph XML string
+    """
+    if not text:
+        return f'<a:p xmlns:a="{_DRAWINGML_NS}"/>'
+    
+    attrs = f' sz="{size_pt * 100}"' if size_pt else ''
+    if bold:
+        attrs += ' b="1"'
+    fill = f'<a:solidFill><a:srgbClr val="{rgb}"/></a:solidFill>' if rgb else ''
+    
+    # Like python-pptx's p.text: line feeds and vertical tabs become <a:br/> between runs
+    # (empty runs are left out), other control characters are written as _xHHHH_ escapes
+    content = []
+    for i, run_text in enumerate(_LINE_BREAK_RE.split(text)):
+        if i:
+            content.append('<a:br/>')
+        if run_text:
+            run_text = escape(_CONTROL_CHAR_RE.sub(lambda m: "_x%04X_" % ord(m.group()), run_text))
+            content.append(f'<a:r><a:rPr{attrs}>{fill}</a:rPr><a:t>{run_text}</a:t></a:r>')
+    return f'<a:p xmlns:a="{_DRAWINGML_NS}">{"".join(content)}</a:p>'
+
+
+def _replace_paragraphs(text_frame, paragraphs: List[str]) -> None:
+    """Replace all paragraphs of a text frame with pre-serialized <a:p> elements"""
+    txBody = text_frame._txBody
+    for p in txBody.p_lst:
+        txBody.remove(p)
+    txBody.extend(parse_xml(xml) for xml in paragraphs)
+
+
 class PowerPointService:
     """Service for generating PowerPoint presentations from analysis data"""
     
@@ -50,12 +106,9 @@ class PowerPointService:
             Path to the generated PowerPoint file
         """
         try:
-            # Create presentation
-            prs = Presentation()
-            
-            # Set slide size to widescreen (16:9)
-            prs.slide_width = Inches(13.33)
-            prs.slide_height = Inches(7.5)
+            # Create presentation from the widescreen (16:9) template; its title and
+            # content layouts already carry the report fonts and colors
+            prs = Presentation(io.BytesIO(_template_bytes()))
             
             # Generate slides
             PowerPointService._add_title_slide(prs, brand_name, analysis_data)
@@ -93,14 +146,6 @@ class PowerPointService:
         # Set subtitle
         subtitle = slide.placeholders[1]
         subtitle.text = f"Non-MMM Analysis Report\nGenerated on {datetime.now().strftime('%B %d, %Y')}"
-        
-        # Style the text
-        title.text_frame.paragraphs[0].font.size = Pt(44)
-        title.text_frame.paragraphs[0].font.bold = True
-        title.text_frame.paragraphs[0].font.color.rgb = RGBColor(0, 51, 102)
-        
-        subtitle.text_frame.paragraphs[0].font.size = Pt(20)
-        subtitle.text_frame.paragraphs[0].font.color.rgb = RGBColor(102, 102, 102)
     
     @staticmethod
     def _add_context_slide(prs: Presentation, analysis_data: Dict[str, Any]):
@@ -114,8 +159,6 @@ class PowerPointService:
         
         # Add content
         content = slide.placeholders[1]
-        tf = content.text_frame
-        tf.clear()
         
         # Add context information
         context_info = [
@@ -136,12 +179,10 @@ class PowerPointService:
                 f"• Data Quality: {data_summary.get('dataQuality', 'N/A')}"
             ])
         
-        for i, line in enumerate(context_info):
-            p = tf.paragraphs[i] if i < len(tf.paragraphs) else tf.add_paragraph()
-            p.text = line
-            p.font.size = Pt(16)
-            if line.startswith("•"):
-                p.font.color.rgb = RGBColor(0, 102, 204)
+        _replace_paragraphs(content.text_frame, [
+            _paragraph_xml(line, rgb=_BULLET_RGB if line.startswith("•") else None)
+            for line in context_info
+        ])
     
     @staticmethod
     def _add_insights_slide(prs: Presentation, analysis_data: Dict[str, Any]):
@@ -155,8 +196,6 @@ class PowerPointService:
         
         # Add content
         content = slide.placeholders[1]
-        tf = content.text_frame
-        tf.clear()
         
         insights = [
             "Key Findings:",
@@ -172,15 +211,16 @@ class PowerPointService:
             "• Professional presentation generation"
         ]
         
-        for i, line in enumerate(insights):
-            p = tf.paragraphs[i] if i < len(tf.paragraphs) else tf.add_paragraph()
-            p.text = line
-            p.font.size = Pt(16)
+        paragraphs = []
+        for line in insights:
             if line.startswith("•"):
-                p.font.color.rgb = RGBColor(0, 102, 204)
+                paragraphs.append(_paragraph_xml(line, rgb=_BULLET_RGB))
             elif line.endswith(":"):
-                p.font.bold = True
-                p.font.color.rgb = RGBColor(0, 51, 102)
+                paragraphs.append(_paragraph_xml(line, bold=True, rgb=_HEADING_RGB))
+            else:
+                paragraphs.append(_paragraph_xml(line))
+        
+        _replace_paragraphs(content.text_frame, paragraphs)
     
     @staticmethod
     def _add_chart_slides(prs: Presentation, analysis_data: Dict[str, Any]):
@@ -195,23 +235,26 @@ class PowerPointService:
             title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.2), Inches(12), Inches(0.8))
             title_frame = title_box.text_frame
             title_frame.text = f"Chart Analysis: {chart.get('variableName', f'Variable {i+1}')}"
-            title_frame.paragraphs[0].font.size = Pt(24)
-            title_frame.paragraphs[0].font.bold = True
-            title_frame.paragraphs[0].font.color.rgb = RGBColor(0, 51, 102)
+            title_font = title_frame.paragraphs[0].font
+            title_font.size = Pt(24)
+            title_font.bold = True
+            title_font.color.rgb = RGBColor(0, 51, 102)
             
             # Add chart information
             info_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.2), Inches(12), Inches(1))
             info_frame = info_box.text_frame
             info_frame.text = f"Expected Sign: {chart.get('expectedSign', '~')} | Trendline: {chart.get('trendlineType', 'Linear')}"
-            info_frame.paragraphs[0].font.size = Pt(14)
-            info_frame.paragraphs[0].font.color.rgb = RGBColor(102, 102, 102)
+            info_font = info_frame.paragraphs[0].font
+            info_font.size = Pt(14)
+            info_font.color.rgb = RGBColor(102, 102, 102)
             
             # Add chart placeholders (since we can't embed actual charts easily)
             chart_box = slide.shapes.add_textbox(Inches(1), Inches(2.5), Inches(11), Inches(4))
             chart_frame = chart_box.text_frame
             chart_frame.text = f"Chart Placeholder\n\nLine Chart: {chart.get('variableName', 'Variable')} vs Target Variable\nScatter Plot: Correlation Analysis\n\nNote: Actual charts would be embedded here in a full implementation"
-            chart_frame.paragraphs[0].font.size = Pt(16)
-            chart_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
+            first_paragraph = chart_frame.paragraphs[0]
+            first_paragraph.font.size = Pt(16)
+            first_paragraph.alignment = PP_ALIGN.CENTER
     
     @staticmethod
     def _add_model_results_slide(prs: Presentation, analysis_data: Dict[str, Any]):
@@ -225,53 +268,32 @@ class PowerPointService:
         
         # Add content
         content = slide.placeholders[1]
-        tf = content.text_frame
-        tf.clear()
         
         model_results = analysis_data.get('modelResults', [])
         
         if model_results:
             # Add model information
-            p = tf.paragraphs[0]
-            p.text = "Statistical Models Trained:"
-            p.font.size = Pt(18)
-            p.font.bold = True
-            p.font.color.rgb = RGBColor(0, 51, 102)
+            paragraphs = [_paragraph_xml("Statistical Models Trained:", 18, True, _HEADING_RGB)]
             
-            for i, model in enumerate(model_results[:3]):  # Show top 3 models
-                p = tf.add_paragraph()
-                p.text = f"• {model.get('modelType', 'Unknown Model')} - R²: {model.get('rSquared', 'N/A')}"
-                p.font.size = Pt(16)
-                p.font.color.rgb = RGBColor(0, 102, 204)
+            for model in model_results[:3]:  # Show top 3 models
+                paragraphs.append(_paragraph_xml(
+                    f"• {model.get('modelType', 'Unknown Model')} - R²: {model.get('rSquared', 'N/A')}",
+                    rgb=_BULLET_RGB
+                ))
             
             # Add best model details
-            if model_results:
-                best_model = model_results[0]
-                p = tf.add_paragraph()
-                p.text = ""
-                
-                p = tf.add_paragraph()
-                p.text = "Best Model Details:"
-                p.font.size = Pt(18)
-                p.font.bold = True
-                p.font.color.rgb = RGBColor(0, 51, 102)
-                
-                p = tf.add_paragraph()
-                p.text = f"• Model Type: {best_model.get('modelType', 'N/A')}"
-                p.font.size = Pt(14)
-                
-                p = tf.add_paragraph()
-                p.text = f"• R² Score: {best_model.get('rSquared', 'N/A')}"
-                p.font.size = Pt(14)
-                
-                p = tf.add_paragraph()
-                p.text = f"• Variables: {len(best_model.get('variables', []))}"
-                p.font.size = Pt(14)
+            best_model = model_results[0]
+            paragraphs.extend([
+                _paragraph_xml(""),
+                _paragraph_xml("Best Model Details:", 18, True, _HEADING_RGB),
+                _paragraph_xml(f"• Model Type: {best_model.get('modelType', 'N/A')}", 14),
+                _paragraph_xml(f"• R² Score: {best_model.get('rSquared', 'N/A')}", 14),
+                _paragraph_xml(f"• Variables: {len(best_model.get('variables', []))}", 14)
+            ])
         else:
-            p = tf.paragraphs[0]
-            p.text = "No model results available"
-            p.font.size = Pt(16)
-            p.font.color.rgb = RGBColor(102, 102, 102)
+            paragraphs = [_paragraph_xml("No model results available", rgb=_MUTED_RGB)]
+        
+        _replace_paragraphs(content.text_frame, paragraphs)
     
     @staticmethod
     def _create_chart_image(chart_data: Dict[str, Any]) -> str:
@@ -36,7 +36,7 @@ from .pack_size_extractor import PackSizeExtractor
 from .data_matcher import DataMatcher
 from .excel_file_handler import ExcelFileHandler
 from .rpi_processor import RPIProcessor
-from .pack_size_coverage_analyzer import PackSizeCoverageAnalyzer
+from .pack_size_coverage_analyzer import PackSizeCoverageAnalyzer, CoverageContext
 
 __all__ = [
     'RPIAdditionService',
@@ -45,6 +45,7 @@ __all__ = [
     'DataMatcher',
     'ExcelFileHandler',
     'RPIProcessor',
-    'PackSizeCoverageAnalyzer'
+    'PackSizeCoverageAnalyzer',
+    'CoverageContext'
 ]
 
@@ -27,8 +27,65 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
+import functools
+
+import numpy as np
 import pandas as pd
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Tuple
+
+from .pack_size_extractor import PackSizeExtractor
+
+
+# Pack size ordering used when the user has not defined one
+DEFAULT_PACK_SIZE_ORDER = ('Sachet', '150-250ML', '251-500ML', '501-650ML', '>650ML')
+
+
+@functools.lru_cache(maxsize=128)
+def _order_positions(pack_size_order: Tuple[str, ...]) -> Dict[str, int]:
+    """Position of each pack size in an ordering (first occurrence, like list.index)"""
+    positions = {}
+    for position, pack_size in enumerate(pack_size_order):
+        positions.setdefault(pack_size, position)
+    return positions
+
+
+@functools.lru_cache(maxsize=100000)
+def _is_rpi_column_relevant_cached(
+    main_pack_size: str,
+    rpi_column_name: str,
+    user_pack_size_order: Tuple[str, ...]
+) -> bool:
+    """Memoized body of DataMatcher.is_rpi_column_relevant_for_main_row (pure in its arguments)"""
+    # Extract our brand's pack size (before v/s) 
+    our_pack_size = PackSizeExtractor.extract_our_brand_pack_size_from_rpi_column(rpi_column_name)
+    
+    if our_pack_size != main_pack_size:
+        return False  # This RPI column is for a different pack size row
+        
+    # Extract competitor's pack size (after v/s)
+    competitor_pack_size = PackSizeExtractor.extract_competitor_pack_size_from_rpi_column(rpi_column_name)
+    
+    return _pack_sizes_relevant(main_pack_size, our_pack_size, competitor_pack_size, user_pack_size_order)
+
+
+def _pack_sizes_relevant(
+    main_pack_size: str,
+    our_pack_size: Optional[str],
+    competitor_pack_size: Optional[str],
+    user_pack_size_order: Tuple[str, ...]
+) -> bool:
+    """Relevance rule for an RPI column whose our/competitor pack sizes are already extracted"""
+    # First check: Our side must match main row's pack size EXACTLY
+    if our_pack_size != main_pack_size:
+        return False  # This RPI column is for a different pack size row
+    
+    if not competitor_pack_size:
+        return False  # Cannot extract competitor pack size
+        
+    # Second check: Is competitor pack size same/adjacent to our pack size?
+    return DataMatcher._is_pack_size_adjacent_or_same(
+        main_pack_size, competitor_pack_size, user_pack_size_order
+    )
 
 
 class DataMatcher:
@@ -99,11 +156,191 @@ class DataMatcher:
             print(f"❌ Error finding matching RPI row: {e}")
             return None
     
+    @staticmethod
+    def build_rpi_index(
+        rpi_df: pd.DataFrame,
+        region_col: Optional[str],
+        month_col: Optional[str],
+        channel_col: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Build a hashed lookup of RPI rows by region, month and channel
+        
+        Build it once per RPI sheet; match_rpi_rows then matches all main data rows
+        against it in bulk instead of scanning the RPI data per row.
+        
+        Args:
+            rpi_df: RPI DataFrame to index
+            region_col: Name of region column
+            month_col: Name of month column
+            channel_col: Name of channel column
+            
+        Returns:
+            Dict with the key columns, their per-row values and the RPI row count
+        """
+        key_columns = []
+        key_values = []
+        
+        if region_col and region_col in rpi_df.columns:
+            key_columns.append((region_col, False))
+            key_values.append(rpi_df[region_col].tolist())
+        
+        if month_col and month_col in rpi_df.columns:
+            # Normalize month formats once ("Feb 22" -> "Feb-22")
+            key_columns.append((month_col, True))
+            key_values.append(rpi_df[month_col].astype(str).str.replace(' ', '-', regex=False).tolist())
+        
+        # RPI data may only have Region + Month dimensions
+        if channel_col and channel_col in rpi_df.columns:
+            key_columns.append((channel_col, False))
+            key_values.append(rpi_df[channel_col].tolist())
+        
+        return {
+            'key_columns': key_columns,
+            'key_values': key_values,
+            'row_count': len(rpi_df)
+        }
+    
+    @staticmethod
+    def match_rpi_rows(main_df: pd.DataFrame, rpi_index: Dict[str, Any]) -> np.ndarray:
+        """
+        Find the matching RPI row position for every main data row at once
+        
+        Matches like find_matching_rpi_row: dimensions a main row has no value for
+        are not filtered on, and the first matching RPI row wins. Main rows are
+        grouped by which dimensions they have values for, and each group is matched
+        with a single left merge against the first RPI row per key.
+        
+        Args:
+            main_df: Main data DataFrame
+            rpi_index: Index built by build_rpi_index
+            
+        Returns:
+            Array of RPI row positions aligned with main_df rows, -1 where no row matches
+        """
+        total_rows = len(main_df)
+        matches = np.full(total_rows, -1, dtype=np.int64)
+        rpi_rows = rpi_index['row_count']
+        if not total_rows or not rpi_rows:
+            return matches
+        
+        # Bit per key column set where the main row has a value to match on
+        patterns = np.zeros(total_rows, dtype=np.int64)
+        main_codes = {}
+        rpi_codes = {}
+        for position, (column, is_month) in enumerate(rpi_index['key_columns']):
+            if column not in main_df.columns:
+                continue
+            values = main_df[column].astype(object)
+            patterns |= values.notna().to_numpy().astype(np.int64) << position
+            if is_month:
+                # Normalize month formats ("Feb 22" -> "Feb-22")
+                values = values.map(lambda value: str(value).replace(' ', '-'))
+            
+            # Code main and RPI values together so the merges join on integers
+            rpi_values = np.empty(rpi_rows, dtype=object)
+            rpi_values[:] = rpi_index['key_values'][position]
+            codes, _ = pd.factorize(np.concatenate([values.to_numpy(), rpi_values]))
+            main_codes[position] = codes[:total_rows]
+            rpi_codes[position] = codes[total_rows:]
+        
+        for pattern in np.unique(patterns):
+            rows = np.flatnonzero(patterns == pattern)
+            positions = [position for position in main_codes if pattern >> position & 1]
+            if not positions:
+                # Nothing to filter on: the first RPI row matches
+                matches[rows] = 0
+                continue
+            
+            rpi_keys = pd.DataFrame({position: rpi_codes[position] for position in positions})
+            rpi_keys['__rpi_position__'] = np.arange(rpi_rows)
+            rpi_keys = rpi_keys.drop_duplicates(subset=positions, keep='first')
+            
+            merged = pd.DataFrame({
+                position: main_codes[position][rows] for position in positions
+            }).merge(rpi_keys, on=positions, how='left', sort=False)
+            matches[rows] = merged['__rpi_position__'].fillna(-1).to_numpy(dtype=np.int64)
+        
+        return matches
+    
+    @staticmethod
+    def build_rpi_column_map(
+        rpi_columns_info: List[Dict[str, Any]]
+    ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        Map each RPI column to its (our pack size, competitor pack size) pair
+        
+        Args:
+            rpi_columns_info: RPI column info from PackSizeAnalyzer
+            
+        Returns:
+            Dict of column name -> (our_pack_size, competitor_pack_size)
+        """
+        rpi_column_map = {}
+        for rpi_col_info in rpi_columns_info:
+            column_name = rpi_col_info['column_name']
+            if 'competitor_pack_size' in rpi_col_info:
+                competitor_pack_size = rpi_col_info['competitor_pack_size']
+            else:
+                competitor_pack_size = PackSizeExtractor.extract_competitor_pack_size_from_rpi_column(column_name)
+            rpi_column_map[column_name] = (rpi_col_info['pack_size'], competitor_pack_size)
+        return rpi_column_map
+    
+    @staticmethod
+    def build_relevance_matrix(
+        main_pack_sizes: List[str],
+        rpi_column_map: Dict[str, Tuple[Optional[str], Optional[str]]],
+        user_pack_size_order: List[str]
+    ) -> pd.DataFrame:
+        """
+        Evaluate RPI column relevance for every main pack size in one vectorized pass
+        
+        Applies the same rules as is_rpi_column_relevant_for_main_row, comparing
+        position arrays of all RPI columns at once per main pack size.
+        
+        Args:
+            main_pack_sizes: Pack sizes found in main data
+            rpi_column_map: RPI column pack sizes from build_rpi_column_map
+            user_pack_size_order: User's ordered list of pack sizes
+            
+        Returns:
+            Boolean DataFrame indexed by main pack size with one column per RPI column
+        """
+        positions = _order_positions(tuple(user_pack_size_order or DEFAULT_PACK_SIZE_ORDER))
+        main_pack_sizes = list(dict.fromkeys(main_pack_sizes))
+        rpi_columns = list(rpi_column_map)
+        
+        our_pack_sizes = np.array([rpi_column_map[col][0] for col in rpi_columns], dtype=object)
+        competitor_pack_sizes = np.array([rpi_column_map[col][1] for col in rpi_columns], dtype=object)
+        has_competitor = np.array([bool(pack_size) for pack_size in competitor_pack_sizes], dtype=bool)
+        # -1 marks competitor pack sizes missing from the ordering
+        competitor_positions = np.array(
+            [positions.get(pack_size, -1) for pack_size in competitor_pack_sizes], dtype=np.int64
+        )
+        
+        rows = []
+        for main_pack_size in main_pack_sizes:
+            main_position = positions.get(main_pack_size)
+            if main_position is None:
+                # Pack size not in ordering: only an exact competitor match is relevant
+                adjacent = competitor_pack_sizes == main_pack_size
+            else:
+                # Same position, position-1 or position+1 only
+                adjacent = (competitor_positions >= 0) & (np.abs(competitor_positions - main_position) <= 1)
+            rows.append((our_pack_sizes == main_pack_size) & has_competitor & adjacent)
+        
+        return pd.DataFrame(
+            np.array(rows, dtype=bool).reshape(len(main_pack_sizes), len(rpi_columns)),
+            index=main_pack_sizes,
+            columns=rpi_columns
+        )
+    
     @staticmethod 
     def is_rpi_column_relevant_for_main_row(
         main_pack_size: str,
         rpi_column_name: str, 
-        user_pack_size_order: List[str]
+        user_pack_size_order: List[str],
+        rpi_column_map: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None
     ) -> bool:
         """
         Check if an RPI column is relevant for a given main data row using correct business logic.
@@ -117,28 +354,20 @@ class DataMatcher:
             main_pack_size: Pack size from main data row (e.g., "Sachet") 
             rpi_column_name: Full RPI column name (e.g., "RPI X-Men Sachet v/s Clear Men 150-250ML")
             user_pack_size_order: User's ordered list of pack sizes
+            rpi_column_map: Optional prebuilt map from build_rpi_column_map; when it
+                holds the column, its pack sizes are not re-extracted from the name
             
         Returns:
             bool: True if RPI column is relevant for this main row
         """
-        from .pack_size_extractor import PackSizeExtractor
-        
-        # Extract our brand's pack size (before v/s) 
-        our_pack_size = PackSizeExtractor.extract_our_brand_pack_size_from_rpi_column(rpi_column_name)
+        if rpi_column_map is not None and rpi_column_name in rpi_column_map:
+            our_pack_size, competitor_pack_size = rpi_column_map[rpi_column_name]
+            return _pack_sizes_relevant(
+                main_pack_size, our_pack_size, competitor_pack_size, user_pack_size_order or ()
+            )
         
-        # First check: Our side must match main row's pack size EXACTLY
-        if our_pack_size != main_pack_size:
-            return False  # This RPI column is for a different pack size row
-            
-        # Extract competitor's pack size (after v/s)
-        competitor_pack_size = PackSizeExtractor.extract_competitor_pack_size_from_rpi_column(rpi_column_name)
-        
-        if not competitor_pack_size:
-            return False  # Cannot extract competitor pack size
-            
-        # Second check: Is competitor pack size same/adjacent to our pack size?
-        return DataMatcher._is_pack_size_adjacent_or_same(
-            main_pack_size, competitor_pack_size, user_pack_size_order
+        return _is_rpi_column_relevant_cached(
+            main_pack_size, rpi_column_name, tuple(user_pack_size_order or ())
         )
     
     @staticmethod
@@ -159,19 +388,15 @@ class DataMatcher:
             bool: True if pack sizes are same or adjacent (position difference <= 1)
         """
         # If no user ordering, use intelligent default ordering
-        if not user_pack_size_order:
-            default_order = ['Sachet', '150-250ML', '251-500ML', '501-650ML', '>650ML']
-            user_pack_size_order = default_order
-            
-        try:
-            position_a = user_pack_size_order.index(pack_size_a)
-        except ValueError:
+        positions = _order_positions(tuple(user_pack_size_order or DEFAULT_PACK_SIZE_ORDER))
+        
+        position_a = positions.get(pack_size_a)
+        if position_a is None:
             # If pack size not in ordering, only allow exact match
             return pack_size_a == pack_size_b
             
-        try:
-            position_b = user_pack_size_order.index(pack_size_b)
-        except ValueError:
+        position_b = positions.get(pack_size_b)
+        if position_b is None:
             # If pack size not in ordering, not relevant  
             return False
             
@@ -210,32 +435,21 @@ class DataMatcher:
         if main_rank == 99 or rpi_rank == 99:  # Unknown pack sizes
             return False
         
-        if not actual_ranks_list or main_rank not in actual_ranks_list or rpi_rank not in actual_ranks_list:
-            return False
-        
-        # Same pack size is always relevant
-        if main_rank == rpi_rank:
-            return True
-        
-        # Find positions in the actual sequence
+        # Find positions in the actual sequence (one scan per rank)
         try:
             main_pos = actual_ranks_list.index(main_rank)
             rpi_pos = actual_ranks_list.index(rpi_rank)
-        except ValueError:
+        except (ValueError, AttributeError):
             return False  # Rank not found in actual data
         
-        # Allow only adjacent positions in the sequence
-        # Smallest in sequence: can only go to next position
-        if main_pos == 0:  # First in sequence
-            return rpi_pos == 1 if len(actual_ranks_list) > 1 else False
-        
-        # Largest in sequence: can only go to previous position  
-        elif main_pos == len(actual_ranks_list) - 1:  # Last in sequence
-            return rpi_pos == main_pos - 1
+        # Same pack size is always relevant
+        if main_rank == rpi_rank:
+            return True
         
-        # Middle positions: can go to previous or next position
-        else:
-            return rpi_pos == main_pos - 1 or rpi_pos == main_pos + 1
+        # Allow only adjacent positions in the sequence: the smallest size can only
+        # go to the next position, the largest only to the previous one, and middle
+        # sizes to either - i.e. positions exactly one apart
+        return abs(main_pos - rpi_pos) == 1
     
     @staticmethod
     def normalize_month_format(month_value: str) -> str:
@@ -28,9 +28,97 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
+import datetime
+import math
+import zipfile
 import pandas as pd
+from xml.etree import ElementTree
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+# Rust-based calamine reader when installed (much faster on large workbooks),
+# otherwise pandas' default engine (openpyxl)
+EXCEL_READ_ENGINE = 'calamine' if python_calamine is not None else None
+
+# Fallback writer when xlsxwriter is not installed (see _stream_sheet for the fast path)
+EXCEL_WRITE_ENGINE = 'xlsxwriter' if xlsxwriter is not None else 'openpyxl'
+
+# Number formats DataFrame.to_excel applies to date and datetime cells
+_DATE_NUMBER_FORMAT = 'YYYY-MM-DD'
+_DATETIME_NUMBER_FORMAT = 'YYYY-MM-DD HH:MM:SS'
+
+# Sheet names per workbook, keyed by (path, mtime_ns, size) so a rewritten file is re-read
+_SHEET_CACHE: Dict[Tuple[str, int, int], List[str]] = {}
+_SHEET_CACHE_MAX_ENTRIES = 64
+
+
+def _list_sheets(file_path: Path) -> List[str]:
+    """Sheet names of an Excel file, opening the workbook only when it changed since last listed"""
+    file_stat = file_path.stat()
+    cache_key = (str(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    
+    sheet_names = _SHEET_CACHE.get(cache_key)
+    if sheet_names is None:
+        sheet_names = ExcelFileHandler.list_sheet_names(file_path)
+        
+        if len(_SHEET_CACHE) >= _SHEET_CACHE_MAX_ENTRIES:
+            # Evict the oldest entry (dicts keep insertion order)
+            _SHEET_CACHE.pop(next(iter(_SHEET_CACHE)), None)
+        _SHEET_CACHE[cache_key] = sheet_names
+    
+    return list(sheet_names)
+
+
+def _stream_sheet(workbook: Any, sheet_name: str, df: pd.DataFrame, formats: Dict[str, Any]) -> None:
+    """
+    Write a DataFrame to a constant_memory xlsxwriter workbook row by row
+    
+    Produces the same cells as DataFrame.to_excel(index=False): header row first,
+    missing values left blank, infinities as 'inf'/'-inf' and dates with pandas'
+    default number formats. pandas itself writes column by column, which
+    constant_memory mode cannot accept.
+    
+    Args:
+        workbook: xlsxwriter Workbook opened with constant_memory
+        sheet_name: Name of the worksheet to add
+        df: Data to write
+        formats: Cell formats keyed by 'date', 'datetime' and 'timedelta'
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    
+    for col_idx, column in enumerate(df.columns):
+        worksheet.write(0, col_idx, column if isinstance(column, (int, float)) else str(column))
+    
+    for row_idx, values in enumerate(df.itertuples(index=False, name=None), start=1):
+        for col_idx, value in enumerate(values):
+            if pd.api.types.is_scalar(value) and pd.isna(value):
+                continue
+            if isinstance(value, bool) or pd.api.types.is_bool(value):
+                worksheet.write_boolean(row_idx, col_idx, bool(value))
+            elif pd.api.types.is_number(value) and not isinstance(value, complex):
+                value = int(value) if pd.api.types.is_integer(value) else float(value)
+                if math.isinf(value):
+                    worksheet.write_string(row_idx, col_idx, 'inf' if value > 0 else '-inf')
+                else:
+                    worksheet.write_number(row_idx, col_idx, value)
+            elif isinstance(value, datetime.datetime):
+                worksheet.write_datetime(row_idx, col_idx, value, formats['datetime'])
+            elif isinstance(value, datetime.date):
+                worksheet.write_datetime(row_idx, col_idx, value, formats['date'])
+            elif isinstance(value, datetime.timedelta):
+                worksheet.write_number(row_idx, col_idx, value.total_seconds() / 86400, formats['timedelta'])
+            else:
+                worksheet.write(row_idx, col_idx, str(value))
 
 
 class ExcelFileHandler:
@@ -40,7 +128,8 @@ class ExcelFileHandler:
     def read_concatenated_file(
         file_path: Path, 
         main_sheet_name: str, 
-        rpi_sheet_name: str
+        rpi_sheet_name: str,
+        available_sheets: Optional[List[str]] = None
     ) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Read main data and RPI sheets from concatenated file
@@ -49,6 +138,8 @@ class ExcelFileHandler:
             file_path: Path to concatenated Excel file
             main_sheet_name: Expected name of main data sheet
             rpi_sheet_name: Expected name of RPI data sheet
+            available_sheets: Sheet names already listed for this file (e.g. by
+                validation); listed here when not given
             
         Returns:
             Tuple of (main_df, rpi_df)
@@ -56,9 +147,9 @@ class ExcelFileHandler:
         try:
             print(f"📖 Reading sheets from: {file_path}")
             
-            # Get available sheet names
-            with pd.ExcelFile(file_path) as xl_file:
-                available_sheets = xl_file.sheet_names
+            # Get available sheet names (cached, usually listed by validation already)
+            if available_sheets is None:
+                available_sheets = _list_sheets(file_path)
             print(f"   📋 Available sheets: {available_sheets}")
             
             # Find main sheet (try multiple names)
@@ -72,9 +163,12 @@ class ExcelFileHandler:
             if not rpi_sheet:
                 raise ValueError(f"RPI data sheet not found. Available: {available_sheets}")
             
-            # Read the sheets
-            main_df = pd.read_excel(file_path, sheet_name=main_sheet)
-            rpi_df = pd.read_excel(file_path, sheet_name=rpi_sheet)
+            # Read both sheets with a single workbook open
+            sheets = pd.read_excel(file_path, sheet_name=[main_sheet, rpi_sheet], engine=EXCEL_READ_ENGINE)
+            
+            main_df = sheets[main_sheet]
+            # Keep the two frames independent even if both names resolve to one sheet
+            rpi_df = sheets[rpi_sheet] if rpi_sheet != main_sheet else main_df.copy()
             
             # Sheets read successfully - no verbose logging needed
             return main_df, rpi_df
@@ -113,12 +207,29 @@ class ExcelFileHandler:
             # Saving enhanced file - no verbose logging needed
             
             # Save with both sheets
-            with pd.ExcelWriter(enhanced_file_path, engine='openpyxl') as writer:
-                # Save enhanced main data
-                enhanced_df.to_excel(writer, sheet_name=f"{main_sheet_name}_Enhanced", index=False)
-                
-                # Save original RPI data for reference
-                rpi_df.to_excel(writer, sheet_name=rpi_sheet_name, index=False)
+            if xlsxwriter is not None:
+                # Stream rows to disk so neither sheet is held as a cell table in memory
+                workbook = xlsxwriter.Workbook(str(enhanced_file_path), {'constant_memory': True})
+                try:
+                    formats = {
+                        'date': workbook.add_format({'num_format': _DATE_NUMBER_FORMAT}),
+                        'datetime': workbook.add_format({'num_format': _DATETIME_NUMBER_FORMAT}),
+                        'timedelta': workbook.add_format({'num_format': '0'}),
+                    }
+                    # Save enhanced main data
+                    _stream_sheet(workbook, f"{main_sheet_name}_Enhanced", enhanced_df, formats)
+                    
+                    # Save original RPI data for reference
+                    _stream_sheet(workbook, rpi_sheet_name, rpi_df, formats)
+                finally:
+                    workbook.close()
+            else:
+                with pd.ExcelWriter(enhanced_file_path, engine=EXCEL_WRITE_ENGINE) as writer:
+                    # Save enhanced main data
+                    enhanced_df.to_excel(writer, sheet_name=f"{main_sheet_name}_Enhanced", index=False)
+                    
+                    # Save original RPI data for reference
+                    rpi_df.to_excel(writer, sheet_name=rpi_sheet_name, index=False)
             
             # Enhanced file saved successfully - no verbose logging needed
             return enhanced_file_path
@@ -141,9 +252,10 @@ class ExcelFileHandler:
             Found main sheet name or None
         """
         main_options = [main_sheet_name, "Concatenated_Data_Enhanced", "Main_Data", "Data"]
+        available_set = set(available_sheets)
         
         for option in main_options:
-            if option in available_sheets:
+            if option in available_set:
                 return option
         
         return None
@@ -187,6 +299,35 @@ class ExcelFileHandler:
         except Exception:
             return False
     
+    @staticmethod
+    def list_sheet_names(file_path: Path) -> List[str]:
+        """
+        List sheet names without loading the workbook
+        
+        For .xlsx files the names come straight from xl/workbook.xml inside the
+        archive, skipping the shared strings and styles a workbook load parses.
+        Other formats (or unusual archive layouts) go through pandas.
+        
+        Args:
+            file_path: Path to Excel file
+            
+        Returns:
+            Sheet names in workbook order
+        """
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                workbook_root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            
+            # Match on local names so both transitional and strict OOXML namespaces work
+            for element in workbook_root:
+                if element.tag.rsplit('}', 1)[-1] == 'sheets':
+                    return [sheet.get('name') for sheet in element if sheet.tag.rsplit('}', 1)[-1] == 'sheet']
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+            pass
+        
+        with pd.ExcelFile(file_path, engine=EXCEL_READ_ENGINE) as xl_file:
+            return list(xl_file.sheet_names)
+    
     @staticmethod
     def get_sheet_info(file_path: Path) -> dict:
         """
@@ -199,15 +340,15 @@ class ExcelFileHandler:
             Dict with sheet information
         """
         try:
-            with pd.ExcelFile(file_path) as xl_file:
-                sheet_names = xl_file.sheet_names
+            sheet_names = _list_sheets(file_path)
+            
+            lower_names = [name.lower() for name in sheet_names]
             
             sheet_info = {
                 'total_sheets': len(sheet_names),
                 'sheet_names': sheet_names,
-                'has_main_sheet': any('data' in name.lower() or 'concatenated' in name.lower() 
-                                    for name in sheet_names),
-                'has_rpi_sheet': any('rpi' in name.lower() for name in sheet_names)
+                'has_main_sheet': any('data' in name or 'concatenated' in name for name in lower_names),
+                'has_rpi_sheet': any('rpi' in name for name in lower_names)
             }
             
             return sheet_info
@@ -35,6 +35,14 @@ from typing import Dict, List, Any, Optional
 from .pack_size_extractor import PackSizeExtractor
 
 
+def _lower_column_map(df: pd.DataFrame) -> Dict[str, str]:
+    """Lowercased column name -> original name, in column order (first of any case-insensitive duplicates wins)"""
+    column_map = {}
+    for col in df.columns:
+        column_map.setdefault(str(col).lower(), col)
+    return column_map
+
+
 class PackSizeAnalyzer:
     """Analyzer for pack size structure in main and RPI data"""
     
@@ -60,13 +68,16 @@ class PackSizeAnalyzer:
         try:
             print("🔍 Analyzing pack sizes in both sheets...")
             
+            # Lowercase the main column names once for all lookups below
+            main_column_map = _lower_column_map(main_df)
+            
             # Find pack size column in main data
-            main_packsize_column = PackSizeAnalyzer._find_pack_size_column(main_df)
+            main_packsize_column = PackSizeAnalyzer._find_pack_size_column(main_df, main_column_map)
             
             # Find key columns in main data
-            region_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['region'])
-            month_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['month'])
-            channel_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['channel'])
+            region_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['region'], main_column_map)
+            month_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['month'], main_column_map)
+            channel_column = PackSizeAnalyzer._find_column_by_pattern(main_df, ['channel'], main_column_map)
             
             # Extract pack sizes from RPI columns (purely data-driven)
             rpi_columns_info = PackSizeAnalyzer._extract_rpi_columns_info(rpi_df)
@@ -99,24 +110,23 @@ class PackSizeAnalyzer:
             return {}
     
     @staticmethod
-    def _find_pack_size_column(df: pd.DataFrame) -> Optional[str]:
-        """Find pack size column in DataFrame"""
-        columns_lower = [col.lower() for col in df.columns]
-        
-        for i, col in enumerate(columns_lower):
-            if 'packsize' in col or 'pack_size' in col or 'size' in col:
-                return df.columns[i]
-        
-        return None
+    def _find_pack_size_column(df: pd.DataFrame, column_map: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Find pack size column in DataFrame ('packsize' and 'pack_size' both contain 'size')"""
+        return PackSizeAnalyzer._find_column_by_pattern(df, ['size'], column_map)
     
     @staticmethod
-    def _find_column_by_pattern(df: pd.DataFrame, patterns: List[str]) -> Optional[str]:
-        """Find column matching any of the given patterns"""
-        for col in df.columns:
-            col_lower = col.lower()
-            for pattern in patterns:
-                if pattern in col_lower:
-                    return col
+    def _find_column_by_pattern(
+        df: pd.DataFrame, 
+        patterns: List[str], 
+        column_map: Optional[Dict[str, str]] = None
+    ) -> Optional[str]:
+        """Find the first column (in column order) matching any of the given patterns"""
+        if column_map is None:
+            column_map = _lower_column_map(df)
+        
+        for col_lower, col in column_map.items():
+            if any(pattern in col_lower for pattern in patterns):
+                return col
         return None
     
     @staticmethod
@@ -137,6 +147,7 @@ class PackSizeAnalyzer:
                 rpi_columns_info.append({
                     'column_name': col,
                     'pack_size': pack_size,
+                    'competitor_pack_size': PackSizeExtractor.extract_competitor_pack_size_from_rpi_column(col),
                     'rank': None,  # No rank - will be assigned by user ordering
                     'category': None  # No category - user decides
                 })
@@ -28,17 +28,84 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
-from typing import Dict, List, Any
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+
+def _build_order_index(user_pack_size_order: List[str]) -> Dict[str, int]:
+    """Pack size -> position in the user's ordering (first occurrence, like list.index)"""
+    order_index = {}
+    for position, pack_size in enumerate(user_pack_size_order):
+        order_index.setdefault(pack_size, position)
+    return order_index
+
+
+def _to_soa(
+    rpi_columns_info: List[Dict[str, Any]], 
+    order_index: Dict[str, int]
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Parallel arrays for rpi_columns_info: ordering positions and column names
+    
+    Positions are -1 for pack sizes missing from the ordering. Entry i of each
+    array describes rpi_columns_info[i].
+    """
+    positions = np.fromiter(
+        (order_index.get(rpi_info['pack_size'], -1) for rpi_info in rpi_columns_info),
+        dtype=np.int32, count=len(rpi_columns_info)
+    )
+    column_names = [rpi_info['column_name'] for rpi_info in rpi_columns_info]
+    return positions, column_names
+
+
+def _relevant_indices(positions: np.ndarray, main_position: int) -> np.ndarray:
+    """Indices of RPI columns at main_position or one either side (same position, position-1, position+1)"""
+    return np.flatnonzero((positions >= 0) & (np.abs(positions - main_position) <= 1))
+
+
+@dataclass(frozen=True, slots=True)
+class CoverageContext:
+    """Lookups derived once from rpi_columns_info and the user's ordering (see PackSizeCoverageAnalyzer.build_context)"""
+    order_index: Dict[str, int]
+    positions: np.ndarray
+    column_names: List[str]
+    rpi_index: Dict[str, Dict[str, Any]]
 
 
 class PackSizeCoverageAnalyzer:
     """Analyzer for pack size coverage between main data and RPI columns"""
     
+    @staticmethod
+    def build_context(
+        rpi_columns_info: List[Dict[str, Any]],
+        user_pack_size_order: List[str] = None
+    ) -> CoverageContext:
+        """
+        Build the lookups shared by the coverage methods for one set of RPI columns and ordering
+        
+        Args:
+            rpi_columns_info: List of RPI column information
+            user_pack_size_order: User's ordered list of pack sizes
+            
+        Returns:
+            CoverageContext to pass as ctx to get_relevant_rpi_columns / analyze_pack_size_coverage
+        """
+        order_index = _build_order_index(user_pack_size_order) if user_pack_size_order else {}
+        positions, column_names = _to_soa(rpi_columns_info, order_index)
+        return CoverageContext(
+            order_index=order_index,
+            positions=positions,
+            column_names=column_names,
+            rpi_index={rpi_info['column_name']: rpi_info for rpi_info in rpi_columns_info}
+        )
+    
     @staticmethod
     def get_relevant_rpi_columns(
         main_pack_size: str, 
         rpi_columns_info: List[Dict[str, Any]],
-        user_pack_size_order: List[str] = None
+        user_pack_size_order: List[str] = None,
+        ctx: Optional[CoverageContext] = None
     ) -> List[Dict[str, Any]]:
         """
         Get RPI columns that are relevant for given main pack size using user's ordering
@@ -47,6 +114,8 @@ class PackSizeCoverageAnalyzer:
             main_pack_size: Pack size from main data
             rpi_columns_info: List of RPI column information
             user_pack_size_order: User's ordered list of pack sizes
+            ctx: build_context(rpi_columns_info, user_pack_size_order), when the caller
+                looks up many pack sizes against the same columns and ordering
             
         Returns:
             List of relevant RPI column information
@@ -55,48 +124,49 @@ class PackSizeCoverageAnalyzer:
             # Without user ordering, return all for now (will be fixed with frontend)
             return rpi_columns_info
         
-        try:
-            main_position = user_pack_size_order.index(main_pack_size)
-        except ValueError:
-            return []  # Main pack size not found in user's ordering
-        
-        relevant_columns = []
+        if ctx is None:
+            ctx = PackSizeCoverageAnalyzer.build_context(rpi_columns_info, user_pack_size_order)
         
-        for rpi_info in rpi_columns_info:
-            rpi_pack_size = rpi_info['pack_size']
-            
-            try:
-                rpi_position = user_pack_size_order.index(rpi_pack_size)
-            except ValueError:
-                continue  # RPI pack size not in user's ordering
-            
-            # Allow same position, position-1, position+1 only
-            if abs(main_position - rpi_position) <= 1:
-                relevant_columns.append(rpi_info)
+        main_position = ctx.order_index.get(main_pack_size)
+        if main_position is None:
+            return []  # Main pack size not found in user's ordering
         
-        return relevant_columns
+        return [rpi_columns_info[i] for i in _relevant_indices(ctx.positions, main_position)]
     
     @staticmethod
     def analyze_pack_size_coverage(
         main_pack_sizes: List[str], 
         rpi_columns_info: List[Dict[str, Any]],
-        user_pack_size_order: List[str] = None
+        user_pack_size_order: List[str] = None,
+        include_recommendations: bool = True,
+        ctx: Optional[CoverageContext] = None
     ) -> Dict[str, Any]:
         """
         Analyze how well RPI columns cover the main pack sizes using user's ordering
         
+        Without an ordering every RPI column counts for every main pack size, so no
+        per-size matching is done: all sizes share one entry listing every column.
+        
         Args:
             main_pack_sizes: List of pack sizes from main data
             rpi_columns_info: List of RPI column information
             user_pack_size_order: User's ordered list of pack sizes
+            include_recommendations: Build the recommendation texts; callers that only
+                need the statistics can pass False (recommendations stays empty)
+            ctx: build_context(rpi_columns_info, user_pack_size_order), if already built
             
         Returns:
             Dict with comprehensive coverage analysis
         """
+        if ctx is None:
+            ctx = PackSizeCoverageAnalyzer.build_context(rpi_columns_info, user_pack_size_order)
+        
         coverage_analysis = {
             'total_main_pack_sizes': len(main_pack_sizes),
             'total_rpi_columns': len(rpi_columns_info),
             'pack_size_coverage': {},
+            # One entry per RPI column; pack_size_coverage refers to these by column name
+            'rpi_index': ctx.rpi_index,
             'missing_coverage': [],
             'excess_rpi_columns': [],
             'needs_user_ordering': user_pack_size_order is None,
@@ -104,131 +174,127 @@ class PackSizeCoverageAnalyzer:
             'recommendations': []
         }
         
-        # Check coverage for each main pack size
-        total_coverage_score = 0
-        for main_size in main_pack_sizes:
-            relevant_rpis = PackSizeCoverageAnalyzer.get_relevant_rpi_columns(
-                main_size, rpi_columns_info, user_pack_size_order
-            )
+        if not user_pack_size_order:
+            all_rpi_names = ctx.column_names
             
-            coverage_analysis['pack_size_coverage'][main_size] = {
-                'relevant_rpi_columns': len(relevant_rpis),
-                'rpi_details': relevant_rpis,
-                'has_coverage': len(relevant_rpis) > 0
+            # Same result as get_relevant_rpi_columns without ordering, computed once
+            shared_coverage = {
+                'relevant_rpi_columns': len(all_rpi_names),
+                'rpi_column_names': all_rpi_names,
+                'has_coverage': len(all_rpi_names) > 0
             }
+            coverage_analysis['pack_size_coverage'] = dict.fromkeys(main_pack_sizes, shared_coverage)
+            if not all_rpi_names:
+                coverage_analysis['missing_coverage'] = list(main_pack_sizes)
+            
+            total_coverage_score = len(main_pack_sizes) if all_rpi_names else 0
+            used_rpi_columns = set(all_rpi_names) if main_pack_sizes else set()
+        else:
+            # RPI column positions come from the context; each main pack size is then a
+            # single vectorized compare over the position array
+            order_index, positions, column_names = ctx.order_index, ctx.positions, ctx.column_names
+            
+            # Check coverage for each main pack size, noting every RPI column that is relevant somewhere
+            total_coverage_score = 0
+            used_rpi_columns = set()
+            for main_size in main_pack_sizes:
+                if not main_size:
+                    # Blank pack size: every RPI column counts, as in get_relevant_rpi_columns
+                    relevant_names = column_names
+                elif main_size not in order_index:
+                    relevant_names = []  # Main pack size not found in user's ordering
+                else:
+                    relevant_names = [
+                        column_names[i] for i in _relevant_indices(positions, order_index[main_size])
+                    ]
+                used_rpi_columns.update(relevant_names)
+                
+                coverage_analysis['pack_size_coverage'][main_size] = {
+                    'relevant_rpi_columns': len(relevant_names),
+                    'rpi_column_names': relevant_names,
+                    'has_coverage': len(relevant_names) > 0
+                }
+                
+                if len(relevant_names) == 0:
+                    coverage_analysis['missing_coverage'].append(main_size)
+                else:
+                    total_coverage_score += 1
             
-            if len(relevant_rpis) == 0:
-                coverage_analysis['missing_coverage'].append(main_size)
-            else:
-                total_coverage_score += 1
+            # Identify excess RPI columns: not relevant for any main pack size
+            # (can't be determined without ordering)
+            coverage_analysis['excess_rpi_columns'] = [
+                rpi_info for rpi_info in rpi_columns_info
+                if rpi_info['column_name'] not in used_rpi_columns
+            ]
         
-        # Calculate coverage statistics
+        # Calculate coverage statistics from the counts gathered above
         coverage_analysis['coverage_statistics'] = PackSizeCoverageAnalyzer._calculate_coverage_stats(
-            coverage_analysis, main_pack_sizes, rpi_columns_info
-        )
-        
-        # Identify excess RPI columns
-        coverage_analysis['excess_rpi_columns'] = PackSizeCoverageAnalyzer._find_excess_rpi_columns(
-            main_pack_sizes, rpi_columns_info, user_pack_size_order
+            len(main_pack_sizes), total_coverage_score, len(used_rpi_columns), len(rpi_columns_info)
         )
         
         # Generate recommendations
-        coverage_analysis['recommendations'] = PackSizeCoverageAnalyzer._generate_recommendations(
-            coverage_analysis
-        )
+        if include_recommendations:
+            coverage_analysis['recommendations'] = list(
+                PackSizeCoverageAnalyzer._iter_recommendations(coverage_analysis)
+            )
         
         return coverage_analysis
     
     @staticmethod
     def _calculate_coverage_stats(
-        coverage_analysis: Dict[str, Any],
-        main_pack_sizes: List[str],
-        rpi_columns_info: List[Dict[str, Any]]
+        total_main: int,
+        covered_main: int,
+        used_rpi_columns: int,
+        total_rpi: int
     ) -> Dict[str, Any]:
-        """Calculate detailed coverage statistics"""
-        total_main = len(main_pack_sizes)
-        covered_main = total_main - len(coverage_analysis['missing_coverage'])
-        
+        """Calculate detailed coverage statistics from the counts gathered in the coverage pass"""
         coverage_percentage = (covered_main / total_main * 100) if total_main > 0 else 0
         
         # Calculate RPI column utilization
-        used_rpi_columns = set()
-        for pack_coverage in coverage_analysis['pack_size_coverage'].values():
-            for rpi_detail in pack_coverage['rpi_details']:
-                used_rpi_columns.add(rpi_detail['column_name'])
-        
-        rpi_utilization = (len(used_rpi_columns) / len(rpi_columns_info) * 100) if rpi_columns_info else 0
+        rpi_utilization = (used_rpi_columns / total_rpi * 100) if total_rpi else 0
         
         return {
             'coverage_percentage': round(coverage_percentage, 1),
             'covered_pack_sizes': covered_main,
-            'uncovered_pack_sizes': len(coverage_analysis['missing_coverage']),
+            'uncovered_pack_sizes': total_main - covered_main,
             'rpi_utilization_percentage': round(rpi_utilization, 1),
-            'used_rpi_columns': len(used_rpi_columns),
-            'unused_rpi_columns': len(rpi_columns_info) - len(used_rpi_columns)
+            'used_rpi_columns': used_rpi_columns,
+            'unused_rpi_columns': total_rpi - used_rpi_columns
         }
     
     @staticmethod
-    def _find_excess_rpi_columns(
-        main_pack_sizes: List[str],
-        rpi_columns_info: List[Dict[str, Any]],
-        user_pack_size_order: List[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Find RPI columns that don't match any main pack sizes"""
-        if not user_pack_size_order:
-            return []  # Can't determine excess without ordering
-        
-        # Get all RPI columns that are relevant for at least one main pack size
-        relevant_rpi_columns = set()
-        
-        for main_size in main_pack_sizes:
-            relevant_rpis = PackSizeCoverageAnalyzer.get_relevant_rpi_columns(
-                main_size, rpi_columns_info, user_pack_size_order
-            )
-            for rpi_info in relevant_rpis:
-                relevant_rpi_columns.add(rpi_info['column_name'])
-        
-        # Find RPI columns that are not relevant for any main pack size
-        excess_columns = []
-        for rpi_info in rpi_columns_info:
-            if rpi_info['column_name'] not in relevant_rpi_columns:
-                excess_columns.append(rpi_info)
-        
-        return excess_columns
-    
-    @staticmethod
-    def _generate_recommendations(coverage_analysis: Dict[str, Any]) -> List[str]:
-        """Generate recommendations based on coverage analysis"""
-        recommendations = []
-        
+    def _iter_recommendations(coverage_analysis: Dict[str, Any]) -> Iterator[str]:
+        """Yield recommendations based on coverage analysis, building each text only when consumed"""
         stats = coverage_analysis['coverage_statistics']
+        coverage_percentage = stats['coverage_percentage']
+        rpi_utilization_percentage = stats['rpi_utilization_percentage']
+        missing = coverage_analysis['missing_coverage']
         
         # Coverage recommendations
-        if stats['coverage_percentage'] < 50:
-            recommendations.append("Low pack size coverage detected. Consider adding more RPI columns or adjusting pack size ordering.")
-        elif stats['coverage_percentage'] < 80:
-            recommendations.append("Moderate pack size coverage. Review missing pack sizes for potential improvements.")
+        if coverage_percentage < 50:
+            yield "Low pack size coverage detected. Consider adding more RPI columns or adjusting pack size ordering."
+        elif coverage_percentage < 80:
+            yield "Moderate pack size coverage. Review missing pack sizes for potential improvements."
         else:
-            recommendations.append("Good pack size coverage achieved.")
+            yield "Good pack size coverage achieved."
         
         # RPI utilization recommendations
-        if stats['rpi_utilization_percentage'] < 50:
-            recommendations.append("Many RPI columns are not being used. Consider reviewing pack size ordering or removing unused columns.")
-        elif stats['rpi_utilization_percentage'] > 90:
-            recommendations.append("Excellent RPI column utilization.")
+        if rpi_utilization_percentage < 50:
+            yield "Many RPI columns are not being used. Consider reviewing pack size ordering or removing unused columns."
+        elif rpi_utilization_percentage > 90:
+            yield "Excellent RPI column utilization."
         
         # Specific missing coverage
-        if coverage_analysis['missing_coverage']:
-            missing_sizes = ', '.join(coverage_analysis['missing_coverage'][:3])
-            if len(coverage_analysis['missing_coverage']) > 3:
-                missing_sizes += f" and {len(coverage_analysis['missing_coverage']) - 3} more"
-            recommendations.append(f"Missing coverage for pack sizes: {missing_sizes}")
+        if missing:
+            missing_sizes = ', '.join(missing[:3])
+            missing_count = len(missing)
+            if missing_count > 3:
+                missing_sizes += f" and {missing_count - 3} more"
+            yield f"Missing coverage for pack sizes: {missing_sizes}"
         
         # User ordering recommendation
         if coverage_analysis['needs_user_ordering']:
-            recommendations.append("Set up user pack size ordering to enable intelligent RPI matching.")
-        
-        return recommendations
+            yield "Set up user pack size ordering to enable intelligent RPI matching."
     
     @staticmethod
     def generate_coverage_report(coverage_analysis: Dict[str, Any]) -> str:
@@ -243,7 +309,8 @@ class PackSizeCoverageAnalyzer:
         """
         stats = coverage_analysis['coverage_statistics']
         
-        report = f"""
+        # Collect the report in pieces and join once at the end
+        parts = [f"""
 Pack Size Coverage Analysis Report
 ==================================
 
@@ -253,24 +320,25 @@ Overview:
 - Coverage: {stats['covered_pack_sizes']}/{coverage_analysis['total_main_pack_sizes']} ({stats['coverage_percentage']}%)
 - RPI Utilization: {stats['used_rpi_columns']}/{coverage_analysis['total_rpi_columns']} ({stats['rpi_utilization_percentage']}%)
 
-"""
+"""]
         
         if coverage_analysis['missing_coverage']:
-            report += f"Missing Coverage:\n"
-            for pack_size in coverage_analysis['missing_coverage']:
-                report += f"  - {pack_size}\n"
-            report += "\n"
+            parts.append("Missing Coverage:\n")
+            parts.extend(f"  - {pack_size}\n" for pack_size in coverage_analysis['missing_coverage'])
+            parts.append("\n")
         
         if coverage_analysis['excess_rpi_columns']:
-            report += f"Unused RPI Columns:\n"
-            for rpi_info in coverage_analysis['excess_rpi_columns']:
-                report += f"  - {rpi_info['column_name']} ({rpi_info['pack_size']})\n"
-            report += "\n"
+            parts.append("Unused RPI Columns:\n")
+            parts.extend(
+                f"  - {rpi_info['column_name']} ({rpi_info['pack_size']})\n"
+                for rpi_info in coverage_analysis['excess_rpi_columns']
+            )
+            parts.append("\n")
         
         if coverage_analysis['recommendations']:
-            report += "Recommendations:\n"
-            for i, rec in enumerate(coverage_analysis['recommendations'], 1):
-                report += f"  {i}. {rec}\n"
+            parts.append("Recommendations:\n")
+            parts.extend(
+                f"  {i}. {rec}\n" for i, rec in enumerate(coverage_analysis['recommendations'], 1)
+            )
         
-        return report
-
+        return ''.join(parts)
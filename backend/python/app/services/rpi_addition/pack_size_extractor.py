@@ -27,9 +27,97 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
-from typing import Optional
+import functools
+import logging
+from typing import Optional, Tuple
 from app.utils.packsize_utils import PackSizeRanker
 
+logger = logging.getLogger(__name__)
+
+# Column names seen across analysis, matching and coverage are few and repeat
+# constantly, so each parse is memoized per name
+_EXTRACTION_CACHE_SIZE = 4096
+
+
+def _competitor_side(rpi_column_name: str) -> Optional[str]:
+    """Text between the first 'v/s' and the next one (or the end), or None without a 'v/s'"""
+    _, separator, rest = rpi_column_name.partition('v/s')
+    if not separator:
+        return None
+    return rest.partition('v/s')[0].strip()
+
+
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
+def _side_pack_size(side: str) -> Optional[str]:
+    """
+    Pack size in one side of an RPI column name, shared by all extractors
+    
+    Competitor sides such as "Clear Men Sachet" recur across many column names,
+    so the pattern search runs once per distinct side text.
+    """
+    return PackSizeRanker.extract_pack_size(side)
+
+
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
+def _our_brand_pack_size(rpi_column_name: str) -> Optional[str]:
+    """Cached body of PackSizeExtractor.extract_our_brand_pack_size_from_rpi_column"""
+    if not rpi_column_name:
+        return None
+    
+    # Our brand's side is everything before 'v/s'
+    our_side, separator, _ = rpi_column_name.partition('v/s')
+    if not separator:
+        return None
+    
+    # Remove "RPI " prefix to get "<Our Brand> <Our PackSize>"
+    our_side = our_side.strip().removeprefix('RPI ').strip()
+    
+    try:
+        # Extract pack size from our side using the pack size extractor
+        return _side_pack_size(our_side)
+    except Exception as e:
+        logger.error("Error extracting pack size from RPI column '%s': %s", rpi_column_name, e)
+        return None
+
+
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
+def _competitor_parts(rpi_column_name: str) -> Optional[Tuple[str, Optional[str], str]]:
+    """Cached (competitor_brand, competitor_pack_size, full_competitor_side) for a valid RPI column name"""
+    competitor_side = _competitor_side(rpi_column_name)
+    
+    try:
+        # Extract pack size from competitor side
+        competitor_pack_size = _side_pack_size(competitor_side)
+    except Exception as e:
+        logger.error("Error extracting competitor info from RPI column '%s': %s", rpi_column_name, e)
+        return None
+    
+    # Extract brand name (everything before the pack size)
+    competitor_brand = competitor_side
+    if competitor_pack_size:
+        # Remove pack size from end to get brand name
+        competitor_brand = competitor_side.replace(competitor_pack_size, '').strip()
+    
+    return competitor_brand, competitor_pack_size, competitor_side
+
+
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
+def _competitor_pack_size(rpi_column_name: str) -> Optional[str]:
+    """Cached body of PackSizeExtractor.extract_competitor_pack_size_from_rpi_column"""
+    if not rpi_column_name:
+        return None
+    
+    competitor_side = _competitor_side(rpi_column_name)
+    if competitor_side is None:
+        return None
+    
+    try:
+        # Extract pack size from competitor side
+        return _side_pack_size(competitor_side)
+    except Exception as e:
+        logger.error("Error extracting competitor pack size from RPI column '%s': %s", rpi_column_name, e)
+        return None
+
 
 class PackSizeExtractor:
     """Extractor for pack sizes from RPI column names"""
@@ -51,26 +139,7 @@ class PackSizeExtractor:
             "RPI X-Men 150-250ML v/s Clear Men Sachet" -> "150-250ML"
             "RPI X-Men Sachet v/s Romano 251-500ML" -> "Sachet"
         """
-        if not rpi_column_name or 'v/s' not in rpi_column_name:
-            return None
-        
-        try:
-            # Split by 'v/s' and take the first part (our brand's side)
-            our_side = rpi_column_name.split('v/s')[0].strip()
-            
-            # Remove "RPI " prefix to get "<Our Brand> <Our PackSize>"
-            if our_side.startswith('RPI '):
-                our_side = our_side[4:].strip()
-            
-            # Extract pack size from our side using the pack size extractor
-            pack_size = PackSizeRanker.extract_pack_size(our_side)
-            
-            # Pack size extraction completed - no verbose logging needed
-            return pack_size
-            
-        except Exception as e:
-            print(f"   ❌ Error extracting pack size from RPI column '{rpi_column_name}': {e}")
-            return None
+        return _our_brand_pack_size(rpi_column_name)
     
     @staticmethod
     def validate_rpi_column_format(rpi_column_name: str) -> bool:
@@ -106,28 +175,16 @@ class PackSizeExtractor:
         if not PackSizeExtractor.validate_rpi_column_format(rpi_column_name):
             return None
         
-        try:
-            # Split by 'v/s' and take the second part (competitor's side)
-            competitor_side = rpi_column_name.split('v/s')[1].strip()
-            
-            # Extract pack size from competitor side
-            competitor_pack_size = PackSizeRanker.extract_pack_size(competitor_side)
-            
-            # Extract brand name (everything before the pack size)
-            competitor_brand = competitor_side
-            if competitor_pack_size:
-                # Remove pack size from end to get brand name
-                competitor_brand = competitor_side.replace(competitor_pack_size, '').strip()
-            
-            return {
-                'competitor_brand': competitor_brand,
-                'competitor_pack_size': competitor_pack_size,
-                'full_competitor_side': competitor_side
-            }
-            
-        except Exception as e:
-            print(f"   ❌ Error extracting competitor info from RPI column '{rpi_column_name}': {e}")
+        parts = _competitor_parts(rpi_column_name)
+        if parts is None:
             return None
+        
+        competitor_brand, competitor_pack_size, competitor_side = parts
+        return {
+            'competitor_brand': competitor_brand,
+            'competitor_pack_size': competitor_pack_size,
+            'full_competitor_side': competitor_side
+        }
     
     @staticmethod
     def extract_competitor_pack_size_from_rpi_column(rpi_column_name: str) -> Optional[str]:
@@ -146,19 +203,12 @@ class PackSizeExtractor:
             "RPI X-Men 150-250ML v/s Clear Men Sachet" -> "Sachet"
             "RPI X-Men Sachet v/s Romano 251-500ML" -> "251-500ML"
         """
-        if not rpi_column_name or 'v/s' not in rpi_column_name:
-            return None
-        
-        try:
-            # Split by 'v/s' and take the second part (competitor's side)
-            competitor_side = rpi_column_name.split('v/s')[1].strip()
-            
-            # Extract pack size from competitor side
-            competitor_pack_size = PackSizeRanker.extract_pack_size(competitor_side)
-            
-            return competitor_pack_size
-            
-        except Exception as e:
-            print(f"   ❌ Error extracting competitor pack size from RPI column '{rpi_column_name}': {e}")
-            return None
-
+        return _competitor_pack_size(rpi_column_name)
+    
+    @classmethod
+    def clear_caches(cls) -> None:
+        """Drop the memoized column name parses (e.g. between test cases)"""
+        _our_brand_pack_size.cache_clear()
+        _competitor_parts.cache_clear()
+        _competitor_pack_size.cache_clear()
+        _side_pack_size.cache_clear()
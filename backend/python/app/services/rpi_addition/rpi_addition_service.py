@@ -36,14 +36,25 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
+import logging
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
 
 from app.models.data_models import RPIAdditionResponse
 from .pack_size_analyzer import PackSizeAnalyzer
 from .excel_file_handler import ExcelFileHandler
 from .rpi_processor import RPIProcessor
 
+logger = logging.getLogger(__name__)
+
+# Sheets and pack size analysis of recently processed files, keyed by
+# (path, mtime_ns, size, main sheet, RPI sheet) so a rewritten file is re-read.
+# Kept small: each entry holds both sheets in memory
+_ANALYSIS_CACHE: Dict[Tuple[str, int, int, str, str], Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]] = {}
+_ANALYSIS_CACHE_MAX_ENTRIES = 4
+
 
 class RPIAdditionService:
     """Main orchestration service for adding RPI columns to main concatenated data"""
@@ -54,7 +65,8 @@ class RPIAdditionService:
         main_sheet_name: str = "Concatenated_Data_Enhanced",
         rpi_sheet_name: str = "RPI",
         brand_name: Optional[str] = None,
-        analysis_id: Optional[str] = None
+        analysis_id: Optional[str] = None,
+        sheet_info: Optional[Dict[str, Any]] = None
     ) -> RPIAdditionResponse:
         """
         Add relevant RPI columns to main concatenated data
@@ -68,16 +80,20 @@ class RPIAdditionService:
             rpi_sheet_name: Name of RPI data sheet
             brand_name: Name of the brand for loading saved pack size ordering
             analysis_id: Analysis ID for loading saved pack size ordering
+            sheet_info: Sheet information from validate_inputs(..., return_sheet_info=True),
+                so the workbook's sheets are not listed again
             
         Returns:
             RPIAdditionResponse with processing results and statistics
         """
         try:
-            print(f"🔄 Starting RPI addition process for: {file_path}")
+            logger.info("🔄 Starting RPI addition process for: %s", file_path)
             
-            # Step 1: Read both sheets from the concatenated file
-            main_df, rpi_df = ExcelFileHandler.read_concatenated_file(
-                file_path, main_sheet_name, rpi_sheet_name
+            # Steps 1-2: Read both sheets and analyze pack sizes (reused when the same
+            # file is processed again unchanged)
+            main_df, rpi_df, pack_size_analysis = RPIAdditionService._read_and_analyze(
+                file_path, main_sheet_name, rpi_sheet_name, brand_name, analysis_id,
+                sheet_info['sheet_names'] if sheet_info and 'error' not in sheet_info else None
             )
             
             # Validate that we successfully read the data
@@ -88,11 +104,6 @@ class RPIAdditionService:
                     rpi_columns=0
                 )
             
-            # Step 2: Analyze pack sizes in both sheets
-            pack_size_analysis = PackSizeAnalyzer.analyze_pack_sizes(
-                main_df, rpi_df, brand_name, analysis_id
-            )
-            
             # Validate pack size analysis results
             if not pack_size_analysis.get("main_packsize_column"):
                 return RPIAdditionService._create_error_response(
@@ -132,13 +143,77 @@ class RPIAdditionService:
             )
             
         except Exception as e:
-            print(f"❌ Error in RPI addition process: {e}")
+            logger.error("❌ Error in RPI addition process: %s", e)
             return RPIAdditionService._create_error_response(
                 f"Error adding RPI columns: {str(e)}",
                 main_rows=0,
                 rpi_columns=0
             )
     
+    @staticmethod
+    def _read_and_analyze(
+        file_path: Path,
+        main_sheet_name: str,
+        rpi_sheet_name: str,
+        brand_name: Optional[str],
+        analysis_id: Optional[str],
+        available_sheets: Optional[List[str]] = None
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+        """
+        Read both sheets and analyze pack sizes, reusing the result for an unchanged file
+        
+        The saved user pack size ordering can change without the data file changing,
+        so it is loaded fresh on every call rather than cached.
+        
+        Args:
+            file_path: Path to concatenated Excel file
+            main_sheet_name: Name of main data sheet
+            rpi_sheet_name: Name of RPI data sheet
+            brand_name: Name of the brand for loading saved pack size ordering
+            analysis_id: Analysis ID for loading saved pack size ordering
+            available_sheets: Sheet names already listed for the file, if any
+            
+        Returns:
+            Tuple of (main_df, rpi_df, pack_size_analysis); empty frames and an empty
+            analysis when the sheets could not be read
+        """
+        try:
+            file_stat = file_path.stat()
+            cache_key = (str(file_path), file_stat.st_mtime_ns, file_stat.st_size, main_sheet_name, rpi_sheet_name)
+        except OSError:
+            cache_key = None
+        
+        cached = _ANALYSIS_CACHE.get(cache_key) if cache_key else None
+        if cached is None:
+            # Step 1: Read both sheets from the concatenated file
+            main_df, rpi_df = ExcelFileHandler.read_concatenated_file(
+                file_path, main_sheet_name, rpi_sheet_name, available_sheets
+            )
+            if main_df.empty or rpi_df.empty:
+                return main_df, rpi_df, {}
+            
+            # Step 2: Analyze pack sizes in both sheets (ordering added below)
+            cached = (main_df, rpi_df, PackSizeAnalyzer.analyze_pack_sizes(main_df, rpi_df))
+            
+            if cache_key and cached[2]:
+                if len(_ANALYSIS_CACHE) >= _ANALYSIS_CACHE_MAX_ENTRIES:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    _ANALYSIS_CACHE.pop(next(iter(_ANALYSIS_CACHE)), None)
+                _ANALYSIS_CACHE[cache_key] = cached
+        
+        main_df, rpi_df, pack_size_analysis = cached
+        if pack_size_analysis:
+            pack_size_analysis = {
+                **pack_size_analysis,
+                'user_pack_size_order': PackSizeAnalyzer._load_user_pack_size_ordering(brand_name, analysis_id)
+            }
+        return main_df, rpi_df, pack_size_analysis
+    
+    @staticmethod
+    def clear_analysis_cache() -> None:
+        """Forget cached sheets and pack size analyses (e.g. between test cases)"""
+        _ANALYSIS_CACHE.clear()
+    
     @staticmethod
     def _create_error_response(
         error_message: str,
@@ -173,25 +248,40 @@ class RPIAdditionService:
             enhanced_file_path: Path to enhanced file
             processing_stats: Processing statistics
         """
-        print(f"✅ RPI addition completed successfully")
-        print(f"   📊 Rows processed: {processing_stats['total_rows_processed']}")
-        print(f"   📈 RPI columns added: {processing_stats['rpi_columns_added']}")
-        print(f"   🎯 Total RPI matches: {processing_stats['total_rpi_matches']}")
-        print(f"   📋 Original columns: {processing_stats['original_columns']}")
-        print(f"   📋 Enhanced columns: {processing_stats['enhanced_columns']}")
-        print(f"   💾 Enhanced file: {enhanced_file_path}")
-        
-        if processing_stats['columns_with_matches']:
-            print(f"   📝 Added columns: {', '.join(processing_stats['columns_with_matches'][:3])}")
-            if len(processing_stats['columns_with_matches']) > 3:
-                print(f"       ... and {len(processing_stats['columns_with_matches']) - 3} more")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        added_columns = processing_stats['columns_with_matches']
+        added_summary = ""
+        if added_columns:
+            added_summary = "\n   📝 Added columns: " + ', '.join(added_columns[:3])
+            if len(added_columns) > 3:
+                added_summary += f"\n       ... and {len(added_columns) - 3} more"
+        
+        logger.info(
+            "✅ RPI addition completed successfully"
+            "\n   📊 Rows processed: %s"
+            "\n   📈 RPI columns added: %s"
+            "\n   🎯 Total RPI matches: %s"
+            "\n   📋 Original columns: %s"
+            "\n   📋 Enhanced columns: %s"
+            "\n   💾 Enhanced file: %s%s",
+            processing_stats['total_rows_processed'],
+            processing_stats['rpi_columns_added'],
+            processing_stats['total_rpi_matches'],
+            processing_stats['original_columns'],
+            processing_stats['enhanced_columns'],
+            enhanced_file_path,
+            added_summary
+        )
     
     @staticmethod
     def validate_inputs(
         file_path: Path,
         main_sheet_name: str,
-        rpi_sheet_name: str
-    ) -> dict:
+        rpi_sheet_name: str,
+        return_sheet_info: bool = False
+    ) -> Union[dict, Tuple[dict, Optional[dict]]]:
         """
         Validate inputs before processing
         
@@ -199,9 +289,11 @@ class RPIAdditionService:
             file_path: Path to Excel file
             main_sheet_name: Main sheet name
             rpi_sheet_name: RPI sheet name
+            return_sheet_info: Also return the sheet information gathered, to pass on
+                to add_rpis_to_main_data (None when the file does not exist)
             
         Returns:
-            Dict with validation results
+            Dict with validation results, or (validation, sheet_info) with return_sheet_info
         """
         validation = {
             'is_valid': True,
@@ -213,7 +305,8 @@ class RPIAdditionService:
         if not ExcelFileHandler.validate_file_exists(file_path):
             validation['errors'].append(f"File does not exist: {file_path}")
             validation['is_valid'] = False
-            return validation  # No point checking further if file doesn't exist
+            # No point checking further if file doesn't exist
+            return (validation, None) if return_sheet_info else validation
         
         # Check sheet information
         sheet_info = ExcelFileHandler.get_sheet_info(file_path)
@@ -221,7 +314,7 @@ class RPIAdditionService:
         if 'error' in sheet_info:
             validation['errors'].append(f"Cannot read file: {sheet_info['error']}")
             validation['is_valid'] = False
-            return validation
+            return (validation, sheet_info) if return_sheet_info else validation
         
         # Check for required sheets
         if not sheet_info['has_main_sheet']:
@@ -237,5 +330,4 @@ class RPIAdditionService:
         if rpi_sheet_name not in sheet_info['sheet_names']:
             validation['warnings'].append(f"Specified RPI sheet '{rpi_sheet_name}' not found")
         
-        return validation
-
+        return (validation, sheet_info) if return_sheet_info else validation
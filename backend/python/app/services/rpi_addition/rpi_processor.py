@@ -7,7 +7,7 @@ Purpose: Core RPI processing logic for adding RPI columns to main data
 
 Description:
 This module contains the core logic for processing RPI addition to main data.
-It handles the iteration through main data rows, matching with RPI data,
+It handles matching main data rows with RPI data (one merge, not a row loop),
 and adding relevant RPI columns based on pack size relationships and user ordering.
 
 Key Functionality:
@@ -28,14 +28,39 @@ Last Updated: 2025-01-27
 Author: BrandBloom Backend Team
 """
 
+import functools
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Tuple
+from typing import Dict, FrozenSet, List, Any, Optional, Tuple
 
 from app.models.data_models import RPIColumnInfo
 from .data_matcher import DataMatcher
 
 
+@functools.lru_cache(maxsize=32)
+def _relevance_lookup(
+    main_pack_sizes: Tuple[str, ...],
+    rpi_columns: Tuple[Tuple[str, Optional[str], Optional[str]], ...],
+    user_pack_size_order: Tuple[str, ...]
+) -> Dict[str, FrozenSet[str]]:
+    """
+    RPI column -> main pack sizes it is relevant for, memoized across calls
+    
+    Keyed on everything relevance depends on, so repeated additions for the same
+    analysis reuse it and a changed user ordering simply misses the cache.
+    Callers must not modify the returned dict.
+    """
+    rpi_column_map = {column: (our, competitor) for column, our, competitor in rpi_columns}
+    relevance_matrix = DataMatcher.build_relevance_matrix(
+        list(main_pack_sizes), rpi_column_map, list(user_pack_size_order)
+    )
+    return {
+        rpi_col_name: frozenset(relevance_matrix.index[relevance_matrix[rpi_col_name].to_numpy()])
+        for rpi_col_name in relevance_matrix.columns
+    }
+
+
 class RPIProcessor:
     """Processor for core RPI addition logic"""
     
@@ -59,7 +84,8 @@ class RPIProcessor:
         try:
             print("🔄 Processing RPI addition to main data...")
             
-            enhanced_df = main_df.copy()
+            # Shallow copy: only new RPI columns are assigned, existing columns stay shared
+            enhanced_df = main_df.copy(deep=False)
             rpi_columns_added = []
             
             # Get column mappings and analysis data
@@ -82,12 +108,33 @@ class RPIProcessor:
             
             print(f"   📋 Final pack size order being used: {user_pack_size_order}")
             
+            # Index RPI rows by their matching keys once for all RPI columns
+            rpi_index = DataMatcher.build_rpi_index(
+                rpi_df,
+                column_mappings['region_col'],
+                column_mappings['month_col'],
+                column_mappings['channel_col']
+            )
+            
+            # Match every main row with its RPI row once, shared by all RPI columns
+            rpi_positions = DataMatcher.match_rpi_rows(main_df, rpi_index)
+            
+            # Decide which RPI columns are relevant for which main pack sizes up front
+            pack_size_codes, pack_sizes = pd.factorize(main_df[column_mappings['main_packsize_col']])
+            main_pack_sizes = [str(pack_size) for pack_size in pack_sizes]
+            rpi_column_map = DataMatcher.build_rpi_column_map(rpi_columns_info)
+            relevance = _relevance_lookup(
+                tuple(main_pack_sizes),
+                tuple((column, our, competitor) for column, (our, competitor) in rpi_column_map.items()),
+                tuple(user_pack_size_order)
+            )
+            
             # Process each RPI column
             total_rows = len(main_df)
             for rpi_col_info in rpi_columns_info:
                 rpi_column_result = RPIProcessor._process_single_rpi_column(
-                    enhanced_df, main_df, rpi_df, rpi_col_info, 
-                    column_mappings, user_pack_size_order, total_rows
+                    enhanced_df, rpi_df, rpi_positions, pack_size_codes, main_pack_sizes,
+                    relevance, rpi_col_info, total_rows
                 )
                 
                 if rpi_column_result:
@@ -119,20 +166,21 @@ class RPIProcessor:
         """Set up pack size ordering, using fallback if user ordering not available"""
         if not user_pack_size_order:
             # No pack size ordering available - using alphabetical order
-            # Fall back to main pack sizes in alphabetical order
-            main_pack_sizes_for_order = main_df[main_packsize_col].dropna().unique().tolist()
-            return sorted(main_pack_sizes_for_order)
+            # Fall back to main pack sizes in alphabetical order (np.unique returns them sorted)
+            pack_sizes = main_df[main_packsize_col].to_numpy()
+            return np.unique(pack_sizes[pd.notna(pack_sizes)]).tolist()
         
         return user_pack_size_order
     
     @staticmethod
     def _process_single_rpi_column(
         enhanced_df: pd.DataFrame,
-        main_df: pd.DataFrame,
         rpi_df: pd.DataFrame,
+        rpi_positions: np.ndarray,
+        pack_size_codes: np.ndarray,
+        main_pack_sizes: List[str],
+        relevance: Dict[str, FrozenSet[str]],
         rpi_col_info: Dict[str, Any],
-        column_mappings: Dict[str, str],
-        user_pack_size_order: List[str],
         total_rows: int
     ) -> RPIColumnInfo:
         """
@@ -140,11 +188,12 @@ class RPIProcessor:
         
         Args:
             enhanced_df: Enhanced DataFrame being built
-            main_df: Original main data
             rpi_df: RPI data
+            rpi_positions: Matching RPI row position per main row from DataMatcher.match_rpi_rows
+            pack_size_codes: Main pack size codes per main row (pd.factorize, -1 for missing)
+            main_pack_sizes: Main pack sizes as text, indexed by code
+            relevance: Main pack sizes each RPI column is relevant for
             rpi_col_info: Information about this RPI column
-            column_mappings: Column name mappings
-            user_pack_size_order: User's pack size ordering
             total_rows: Total number of rows in main data
             
         Returns:
@@ -155,39 +204,26 @@ class RPIProcessor:
         
         # Use the original RPI column name directly
         new_col_name = rpi_col_name
-        enhanced_df[new_col_name] = np.nan
         
-        # Track rows where we added RPI data
-        matches_found = 0
+        # Main pack sizes this RPI column is relevant for
+        relevant_pack_sizes = relevance.get(rpi_col_name, frozenset())
         
-        # For each row in main data, check if this RPI column is relevant
-        for idx, row in main_df.iterrows():
-            main_pack_size = row.get(column_mappings['main_packsize_col'])
-            
-            if pd.notna(main_pack_size):
-                # Check if this RPI column is relevant using correct business logic
-                # This checks: 1) Our side = main pack size, 2) Competitor side = same/adjacent
-                is_relevant = DataMatcher.is_rpi_column_relevant_for_main_row(
-                    str(main_pack_size), rpi_col_name, user_pack_size_order
-                )
-                
-                if is_relevant:
-                    # Find matching row in RPI data
-                    rpi_match = DataMatcher.find_matching_rpi_row(
-                        rpi_df, row, 
-                        column_mappings['region_col'], 
-                        column_mappings['month_col'], 
-                        column_mappings['channel_col']
-                    )
-                    
-                    if rpi_match is not None and rpi_col_name in rpi_df.columns:
-                        rpi_value = rpi_df.loc[rpi_match, rpi_col_name]
-                        if pd.notna(rpi_value):
-                            enhanced_df.loc[idx, new_col_name] = rpi_value
-                            matches_found += 1
+        # Relevance: 1) Our side = main pack size, 2) Competitor side = same/adjacent
+        relevant_codes = [code for code, pack_size in enumerate(main_pack_sizes) if pack_size in relevant_pack_sizes]
+        is_relevant = np.isin(pack_size_codes, relevant_codes)
+        
+        column_values = np.full(total_rows, np.nan)
+        matches_found = 0
+        if rpi_col_name in rpi_df.columns:
+            rows = np.flatnonzero(is_relevant & (rpi_positions >= 0))
+            rpi_values = rpi_df[rpi_col_name].to_numpy()[rpi_positions[rows]]
+            found = pd.notna(rpi_values)
+            column_values[rows[found]] = rpi_values[found]
+            matches_found = int(found.sum())
         
         # Only keep the column if we found matches
         if matches_found > 0:
+            enhanced_df[new_col_name] = column_values
             # Column added successfully - no verbose logging needed
             return RPIColumnInfo(
                 original_rpi_column=rpi_col_name,
@@ -199,7 +235,7 @@ class RPIProcessor:
             )
         else:
             # Remove the column if no matches found
-            enhanced_df.drop(columns=[new_col_name], inplace=True)
+            enhanced_df.drop(columns=[new_col_name], inplace=True, errors='ignore')
             # Column skipped - no verbose logging needed
             return None
     
@@ -86,9 +86,9 @@ def get_relevant_rpi_columns(main_pack_size, rpi_columns_info, user_pack_size_or
     )
 
 
-def analyze_pack_size_coverage(main_pack_sizes, rpi_columns_info, user_pack_size_order=None):
+def analyze_pack_size_coverage(main_pack_sizes, rpi_columns_info, user_pack_size_order=None, include_recommendations=True):
     """Analyze how well RPI columns cover the main pack sizes using user's ordering"""
     return PackSizeCoverageAnalyzer.analyze_pack_size_coverage(
-        main_pack_sizes, rpi_columns_info, user_pack_size_order
+        main_pack_sizes, rpi_columns_info, user_pack_size_order, include_recommendations
     )
 
@@ -33,11 +33,33 @@ Last Updated: 2024-12-23
 Author: BrandBloom Backend Team
 """
 
+import re
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
 from app.core.config import settings
 
+# One pass per column name: the alternatives are tried in category order, each
+# looking ahead for its keywords anywhere in the name, so the first category
+# with a keyword wins (not the keyword that appears first)
+_CATEGORY_RE = re.compile(
+    r"(?=.*(?:VOLUME|VALUE|UNIT))(?P<Revenue>)"
+    r"|(?=.*(?:WTD|STORES))(?P<Distribution>)"
+    r"|(?=.*(?:PRICE|RPI))(?P<Pricing>)"
+    r"|(?=.*(?:PROMO|TUP|BTL))(?P<Promotion>)"
+    r"|(?=.*(?:GRP|SPEND))(?P<Media>)",
+    re.DOTALL
+)
+
+# Sheet name prefix -> (region, channel), matched in one pass
+_SHEET_PREFIXES = {
+    "NTW": ("NTW", "GT+MT"),
+    "MT": ("NTW", "MT"),
+    "GT": ("NTW", "GT")
+}
+_SHEET_PREFIX_RE = re.compile("|".join(_SHEET_PREFIXES))
+
 def categorize_columns(columns: List[str]) -> Dict[str, List[str]]:
     """
     Categorize columns into business-relevant groups based on column names
@@ -66,37 +88,8 @@ def categorize_columns(columns: List[str]) -> Dict[str, List[str]]:
     }
     
     for col in columns:
-        col_upper = col.upper()
-        categorized_flag = False
-        
-        # Revenue category
-        if any(keyword in col_upper for keyword in ["VOLUME", "VALUE", "UNIT"]):
-            categorized["Revenue"].append(col)
-            categorized_flag = True
-        
-        # Distribution category
-        elif any(keyword in col_upper for keyword in ["WTD", "STORES"]):
-            categorized["Distribution"].append(col)
-            categorized_flag = True
-        
-        # Pricing category
-        elif any(keyword in col_upper for keyword in ["PRICE", "RPI"]):
-            categorized["Pricing"].append(col)
-            categorized_flag = True
-        
-        # Promotion category
-        elif any(keyword in col_upper for keyword in ["PROMO", "TUP", "BTL"]):
-            categorized["Promotion"].append(col)
-            categorized_flag = True
-        
-        # Media category
-        elif any(keyword in col_upper for keyword in ["GRP", "SPEND"]):
-            categorized["Media"].append(col)
-            categorized_flag = True
-        
-        # Others category
-        if not categorized_flag:
-            categorized["Others"].append(col)
+        match = _CATEGORY_RE.match(col.upper())
+        categorized[match.lastgroup if match else "Others"].append(col)
     
     return categorized
 
@@ -118,27 +111,18 @@ def determine_column_values(sheet_name: str) -> Tuple[str, str, str]:
     """
     sheet_upper = sheet_name.upper().strip()
     words = sheet_name.strip().split()
-    
-    if sheet_upper.startswith("NTW"):
-        # Remove "NTW" and use rest as packsize
-        packsize = " ".join(words[1:]) if len(words) > 1 else ""
-        return "NTW", "GT+MT", packsize
-    elif sheet_upper.startswith("MT"):
-        # Remove "MT" and use rest as packsize
-        packsize = " ".join(words[1:]) if len(words) > 1 else ""
-        return "NTW", "MT", packsize
-    elif sheet_upper.startswith("GT"):
-        # Remove "GT" and use rest as packsize
-        packsize = " ".join(words[1:]) if len(words) > 1 else ""
-        return "NTW", "GT", packsize
-    else:
-        # Split sheet name into words
-        if len(words) >= 1:
-            region = words[0]
-            packsize = " ".join(words[1:]) if len(words) > 1 else ""
-            return region, "GT", packsize
-        else:
-            return "Unknown", "GT", ""
+    packsize = " ".join(words[1:])
+    
+    # NTW/MT/GT sheets: fixed region and channel, rest of sheet name is packsize
+    prefix = _SHEET_PREFIX_RE.match(sheet_upper)
+    if prefix:
+        region, channel = _SHEET_PREFIXES[prefix.group()]
+        return region, channel, packsize
+    
+    # Other sheets: first word is region, remaining words are packsize
+    if words:
+        return words[0], "GT", packsize
+    return "Unknown", "GT", ""
 
 def remove_low_data_columns(df: pd.DataFrame, min_records: int = None) -> Tuple[pd.DataFrame, List[str]]:
     """
@@ -158,7 +142,6 @@ def remove_low_data_columns(df: pd.DataFrame, min_records: int = None) -> Tuple[
         min_records = settings.MIN_DATA_RECORDS
     
     columns_to_remove = []
-    df_cleaned = df.copy()
     
     for column in df.columns:
         # Skip preserved business columns (case-insensitive)
@@ -166,18 +149,22 @@ def remove_low_data_columns(df: pd.DataFrame, min_records: int = None) -> Tuple[
             continue
             
         # Count valid (non-null, non-empty) records
-        valid_count = 0
-        for value in df[column]:
-            # Check if value is not null, not NaN, and not empty string
-            if pd.notna(value) and value != "" and str(value).strip() != "":
-                valid_count += 1
+        values = df[column]
+        valid = values.notna()
+        if not (is_numeric_dtype(values.dtype) or is_datetime64_any_dtype(values.dtype)):
+            # Only text can be empty or whitespace; numbers and dates never are
+            valid &= values.astype(str).str.strip().ne("")
+        valid_count = int(valid.sum())
         
         # Remove column if it has insufficient data
         if valid_count < min_records:
             columns_to_remove.append(column)
-            df_cleaned = df_cleaned.drop(columns=[column])
     
-    return df_cleaned, columns_to_remove
+    # One drop for all columns instead of rebuilding the frame per column
+    if columns_to_remove:
+        return df.drop(columns=columns_to_remove), columns_to_remove
+    
+    return df, []
 
 def add_or_update_business_columns(df: pd.DataFrame, region: str, channel: str, packsize: str) -> pd.DataFrame:
     """
@@ -195,8 +182,8 @@ def add_or_update_business_columns(df: pd.DataFrame, region: str, channel: str,
     Returns:
         pd.DataFrame: Modified dataframe with business columns
     """
-    # Make a copy to avoid modifying the original
-    df_modified = df.copy()
+    # Shallow copy: assigned columns get new arrays, so the original is not modified
+    df_modified = df.copy(deep=False)
     
     # Define the columns we want to add/update with proper names
     target_columns = {
@@ -234,37 +221,27 @@ def add_or_update_business_columns(df: pd.DataFrame, region: str, channel: str,
                 month_col_index = i
                 break
         
-        if month_col_index is not None:
-            # Insert new columns right after Month column
-            columns_list = list(df_modified.columns)
-            insert_position = month_col_index + 1
-            
-            # Add the data for new columns
-            for col_name, col_value in columns_to_add.items():
-                df_modified[col_name] = col_value
-            
-            # Reorder columns to place new ones after Month
-            new_column_names = list(columns_to_add.keys())
-            
-            # Create new column order: everything up to Month, new columns, everything after Month
-            new_order = (
-                columns_list[:insert_position] +  # Up to and including Month
-                new_column_names +                # New columns
-                [col for col in columns_list[insert_position:] if col not in new_column_names]  # Rest
-            )
-            
-            df_modified = df_modified[new_order]
-        else:
-            # If no Month column found, add at the beginning
-            columns_list = list(df_modified.columns)
-            new_column_names = list(columns_to_add.keys())
-            
-            # Reorder: new columns first, then existing columns
-            new_order = new_column_names + [col for col in columns_list if col not in new_column_names]
-            df_modified = df_modified[new_order]
+        # Insert new columns right after Month column, or at the beginning if no Month column found
+        insert_position = month_col_index + 1 if month_col_index is not None else 0
+        for offset, (col_name, col_value) in enumerate(columns_to_add.items()):
+            df_modified.insert(insert_position + offset, col_name, col_value)
     
     return df_modified
 
+def _format_timestamp(value: datetime) -> str:
+    """Format a timestamp the way previews show it"""
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+# Converter per exact value type, so common cells skip the isinstance checks
+_JSON_CONVERTERS = {
+    pd.Timestamp: _format_timestamp,
+    datetime: _format_timestamp,
+    str: str,
+    int: str,
+    float: str,
+    bool: str
+}
+
 def convert_to_json_serializable(value: Any) -> Any:
     """
     Convert pandas/numpy types to JSON serializable values
@@ -277,10 +254,12 @@ def convert_to_json_serializable(value: Any) -> Any:
     """
     if pd.isna(value):
         return None
-    elif isinstance(value, (pd.Timestamp, datetime)):
-        return value.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(value) else None
-    else:
-        return str(value) if pd.notna(value) else None
+    
+    converter = _JSON_CONVERTERS.get(type(value))
+    if converter is None:
+        # Subclasses of datetime are formatted too; anything else becomes text
+        converter = _format_timestamp if isinstance(value, datetime) else str
+    return converter(value)
 
 def generate_preview_data(df: pd.DataFrame, max_rows: int = None) -> List[Dict[str, Any]]:
     """
@@ -296,24 +275,38 @@ def generate_preview_data(df: pd.DataFrame, max_rows: int = None) -> List[Dict[s
     if max_rows is None:
         max_rows = settings.PREVIEW_ROWS
     
-    preview_data = []
-    preview_rows = min(max_rows, len(df))
-    
-    for i in range(preview_rows):
-        row_data = {}
-        for col in df.columns:
-            value = df.iloc[i][col]
-            row_data[col] = convert_to_json_serializable(value)
-        preview_data.append(row_data)
+    preview_rows = max(min(max_rows, len(df)), 0)
+    preview = df.head(preview_rows)
+    
+    # Values as a row read gives them: all-numeric frames share one common dtype
+    if preview_rows and len(preview.columns) > 1:
+        row_dtype = preview.iloc[0].dtype
+        if row_dtype != object:
+            preview = preview.astype(row_dtype)
+    
+    # Convert column by column instead of one positional lookup per cell
+    columns = []
+    for _, values in preview.items():
+        if is_datetime64_any_dtype(values.dtype):
+            formatted = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+            columns.append([None if pd.isna(value) else value for value in formatted])
+        else:
+            columns.append([convert_to_json_serializable(value) for value in values])
     
-    return preview_data
+    return [
+        {col: column[i] for col, column in zip(preview.columns, columns)}
+        for i in range(preview_rows)
+    ]
 
-def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+def validate_dataframe(df: pd.DataFrame, deep_memory: bool = False) -> Dict[str, Any]:
     """
     Validate dataframe and return quality metrics
     
     Args:
         df: Dataframe to validate
+        deep_memory: Measure the real size of every object (text) cell for
+            memory_usage, a full scan of those columns; by default only the
+            column buffers are counted
         
     Returns:
         Dict with validation results and metrics
@@ -328,9 +321,10 @@ def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
     metrics = {
         "total_rows": len(df),
         "total_columns": len(df.columns),
+        # Per-column counts are reported, so this one full pass stays
         "null_counts": df.isnull().sum().to_dict(),
         "data_types": df.dtypes.astype(str).to_dict(),
-        "memory_usage": df.memory_usage(deep=True).sum()
+        "memory_usage": df.memory_usage(deep=deep_memory).sum()
     }
     
     return {
@@ -351,11 +345,9 @@ def remove_empty_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
     if df.empty:
         return df, []
     
-    empty_columns = []
-    
-    for col in df.columns:
-        if df[col].isna().all() or df[col].isnull().all():
-            empty_columns.append(col)
+    # One reduction over the whole frame instead of a check per column
+    is_empty = df.isna().all(axis=0)
+    empty_columns = is_empty.index[is_empty.to_numpy()].tolist()
     
     if empty_columns:
         df_cleaned = df.drop(columns=empty_columns)
@@ -15,6 +15,19 @@ from typing import Optional, Dict, List, Tuple
 from enum import Enum
 
 
+# Patterns used by PackSizeRanker.extract_pack_size, compiled once at import
+_SACHET_RE = re.compile(r'\bsachet\b|\bpouch\b')
+_SIZE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\b(\d+[-\s]*\d+)\s*ml\b',        # Range patterns: 150-250ML, 251-500ML, etc.
+    r'\b(>\s*\d+)\s*ml\b',             # Greater than: >650ML, > 500ML
+    r'\b(<\s*\d+)\s*ml\b',             # Less than: <150ML
+    r'\b(\d+)\s*ml\b',                 # Single values: 150ML, 500ML, 1000ML
+    r'\b(\d+(?:\.\d+)?)\s*l(?:tr)?\b', # Liters: 1L, 1.5L, 2LTR
+))
+_WHITESPACE_RE = re.compile(r'\s+')
+_LITRE_UNIT_RE = re.compile(r'\bl(?:tr)?\b')
+
+
 class PackSizeCategory(Enum):
     """Enumeration of pack size categories with their ranking order."""
     SACHET = 1
@@ -84,28 +97,20 @@ class PackSizeRanker:
         text_lower = text.lower().strip()
         
         # Check for sachet/pouch first (highest priority)
-        if re.search(r'\bsachet\b|\bpouch\b', text_lower):
+        if _SACHET_RE.search(text_lower):
             return 'Sachet'
             
         # Extract pack sizes exactly as they appear in the data (no hardcoded categories)
         # Look for any size patterns and return them as-is
-        size_patterns = [
-            r'\b(\d+[-\s]*\d+)\s*ml\b',        # Range patterns: 150-250ML, 251-500ML, etc.
-            r'\b(>\s*\d+)\s*ml\b',             # Greater than: >650ML, > 500ML
-            r'\b(<\s*\d+)\s*ml\b',             # Less than: <150ML
-            r'\b(\d+)\s*ml\b',                 # Single values: 150ML, 500ML, 1000ML
-            r'\b(\d+(?:\.\d+)?)\s*l(?:tr)?\b', # Liters: 1L, 1.5L, 2LTR
-        ]
-        
-        for pattern in size_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in _SIZE_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 size_part = match.group(1).strip()
                 # Clean up spacing in size part
-                size_part = re.sub(r'\s+', '', size_part)  # Remove internal spaces
+                size_part = _WHITESPACE_RE.sub('', size_part)  # Remove internal spaces
                 
                 # Determine unit based on original text
-                if re.search(r'\bl(?:tr)?\b', match.group(0)):
+                if _LITRE_UNIT_RE.search(match.group(0)):
                     return f"{size_part}L"
                 else:
                     return f"{size_part}ML"
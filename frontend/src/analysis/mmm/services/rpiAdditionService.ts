@@ -76,12 +76,13 @@ export interface PackSizeCoverageAnalysis {
   total_rpi_columns: number;
   pack_size_coverage: Record<string, {
     relevant_rpi_columns: number;
-    rpi_details: Array<{
-      column_name: string;
-      pack_size: string;
-      rank: number;
-      category: string;
-    }>;
+    rpi_column_names: string[];  // details in rpi_index
+  }>;
+  rpi_index: Record<string, {
+    column_name: string;
+    pack_size: string;
+    rank: number;
+    category: string;
   }>;
   missing_coverage: string[];
   excess_rpi_columns: Array<{